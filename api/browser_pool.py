@@ -0,0 +1,102 @@
+from contextlib import contextmanager, suppress
+
+from playwright.sync_api import sync_playwright
+
+
+class BrowserPool:
+    """A long-lived Chromium browser and context shared across scrape cycles.
+
+    The browser is launched lazily, relaunched (with a fresh Playwright
+    driver) if it has disconnected or a page errored, and recycled after ``max_uses`` pages to cap memory
+    growth. Like the rest of Playwright's sync API it must only be used from
+    the thread that created it.
+    """
+
+    def __init__(self, headless=True, max_uses=50):
+        self.headless = headless
+        self.max_uses = max_uses
+        self.uses = 0
+        self.stats = {"launches": 0, "relaunches": 0, "pages": 0, "errors": 0}
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._broken = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _healthy(self):
+        return self._browser is not None and not self._broken and self._browser.is_connected()
+
+    def _stop_driver(self):
+        if self._playwright is not None:
+            with suppress(Exception):
+                self._playwright.stop()
+            self._playwright = None
+
+    def _start_browser(self):
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        # Keeping one context lets cookies (e.g. a cleared captcha) carry over.
+        self._context = self._browser.new_context()
+
+    def _launch(self):
+        try:
+            self._start_browser()
+        except Exception as exc:
+            # Most likely the driver process died under us; retry once on a new one.
+            print(f"Chromium launch failed ({exc}); restarting the Playwright driver")
+            self._close_browser()
+            self._stop_driver()
+            self._start_browser()
+        self._broken = False
+        self.uses = 0
+        self.stats["launches"] += 1
+
+    def _close_browser(self):
+        with suppress(Exception):
+            if self._context is not None:
+                self._context.close()
+        with suppress(Exception):
+            if self._browser is not None:
+                self._browser.close()
+        self._context = None
+        self._browser = None
+
+    def _ensure_browser(self):
+        healthy = self._healthy()
+        if healthy and self.uses < self.max_uses:
+            return
+        if self._browser is not None:
+            reason = "recycling after max uses" if healthy else "browser unhealthy"
+            print(f"Relaunching Chromium ({reason})")
+            self.stats["relaunches"] += 1
+            self._close_browser()
+        if not healthy:
+            # A dead driver also shows up as a disconnected browser.
+            self._stop_driver()
+        self._launch()
+
+    @contextmanager
+    def page(self):
+        self._ensure_browser()
+        page = self._context.new_page()
+        self.uses += 1
+        self.stats["pages"] += 1
+        try:
+            yield page
+        except Exception:
+            self._broken = True
+            self.stats["errors"] += 1
+            raise
+        finally:
+            with suppress(Exception):
+                page.close()
+
+    def close(self):
+        self._close_browser()
+        self._stop_driver()
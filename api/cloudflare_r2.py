@@ -1,6 +1,7 @@
 import json
 import os
-from typing import Iterable
+from io import BytesIO
+from typing import BinaryIO, Iterable
 
 import boto3
 from dotenv import load_dotenv
@@ -51,17 +52,23 @@ class CloudflareR2Client:
         return f"{self.public_base_url}/{self._full_key(key)}"
 
     def upload_file(self, local_path: str, key: str, content_type: str = "application/octet-stream") -> str:
-        full_key = self._full_key(key)
         with open(local_path, "rb") as f:
-            self.client.put_object(
-                Bucket=self.bucket,
-                Key=full_key,
-                Body=f,
-                ContentType=content_type,
-                CacheControl="public, max-age=300",
-            )
+            return self.upload_fileobj(f, key, content_type=content_type)
+
+    def upload_fileobj(self, fileobj: BinaryIO, key: str, content_type: str = "application/octet-stream") -> str:
+        full_key = self._full_key(key)
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=full_key,
+            Body=fileobj,
+            ContentType=content_type,
+            CacheControl="public, max-age=300",
+        )
         return self.public_url(key)
 
+    def upload_bytes(self, data: bytes, key: str, content_type: str = "application/octet-stream") -> str:
+        return self.upload_fileobj(BytesIO(data), key, content_type=content_type)
+
     def upload_json(self, payload: dict, key: str) -> str:
         body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
         full_key = self._full_key(key)
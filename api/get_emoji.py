@@ -1,7 +1,11 @@
+import hashlib
+import heapq
 import json
 import os
-# import Levenshtein
-# import word2emoji
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from functools import lru_cache
 import re
 pattern = re.compile(r'[^a-z\s]+')
 
@@ -16,32 +20,232 @@ def remove_stopwords(s):
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 codes_path = os.path.join(current_dir, "static", "codes.json")
-demoji = json.load(open(codes_path, "r"))
-# print(len(demoji))
-enmoji = {v: k for k, v in demoji.items()}
+index_path = os.path.join(current_dir, "static", "codes.index.json")
+INDEX_FORMAT = 1
 
-wordsets = [(remove_stopwords(set(get_words(k))), v) for k, v in enmoji.items()]
+# word -> [(emoji, len(wordset))] for every emoji name containing that word.
+# emoji_rank keeps each emoji's position in codes.json order so ties break the
+# same way the original linear scan did. Both are filled on first use.
+word_index = None
+emoji_rank = None
+_index_lock = threading.Lock()
 
-def search(s):
-    swords = set(get_words(s))
-    # print(swords)
+# Fuzzy mode only maps a query word onto an inflection of an index word
+# ("strawberries" -> "strawberry", "roasted" -> "roast"); anything looser
+# turns "shank" into a shark and "belly" into a bell.
+FUZZY_MIN_WORD_LENGTH = 4
+INFLECTION_SUFFIXES = ("s", "es", "d", "ed", "ing")
 
-    candidates = {}
-    for wordset, emoji in wordsets:
-        sim = len(wordset.intersection(swords))
-        if sim > 0:
-            candidates[emoji] = sim / len(wordset)
+def _source_fingerprint(path):
+    stat = os.stat(path)
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
 
-    return candidates
+def _source_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-def get_top_emoji(s):
-    s = search(s)
-    if len(s):
-        return sorted(s.items(), key=lambda x: -x[1])[0][0]
+def _build_artifact():
+    with open(codes_path, "r") as f:
+        demoji = json.load(f)
+    enmoji = {v: k for k, v in demoji.items()}
+    wordsets = [(remove_stopwords(set(get_words(k))), v) for k, v in enmoji.items()]
+
+    emojis, lengths, index = [], [], {}
+    for rank, (wordset, emoji) in enumerate(wordsets):
+        emojis.append(emoji)
+        lengths.append(len(wordset))
+        for word in sorted(wordset):
+            index.setdefault(word, []).append(rank)
+
+    return {
+        "format": INDEX_FORMAT,
+        "source": {**_source_fingerprint(codes_path), "sha256": _source_hash(codes_path)},
+        "emojis": emojis,
+        "lengths": lengths,
+        "index": index,
+    }
+
+def _save_artifact(artifact):
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(artifact, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+    except OSError as exc:
+        print(f"Could not save emoji index: {exc}")
+        with suppress(OSError):
+            os.remove(tmp_path)
+
+def _load_artifact():
+    try:
+        with open(index_path, "r") as f:
+            artifact = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if artifact.get("format") != INDEX_FORMAT:
+        return None
+
+    source = artifact.get("source", {})
+    if {"mtime": source.get("mtime"), "size": source.get("size")} == _source_fingerprint(codes_path):
+        return artifact
+    # mtime changes on checkout/copy; only rebuild if the content changed too.
+    if source.get("sha256") == _source_hash(codes_path):
+        artifact["source"].update(_source_fingerprint(codes_path))
+        _save_artifact(artifact)
+        return artifact
     return None
 
+def rebuild_index():
+    artifact = _build_artifact()
+    _save_artifact(artifact)
+    _install(artifact)
+    return artifact
+
+def _install(artifact):
+    global word_index, emoji_rank
+    _resolve_word.cache_clear()
+    emojis, lengths = artifact["emojis"], artifact["lengths"]
+    emoji_rank = {emoji: rank for rank, emoji in enumerate(emojis)}
+    word_index = {
+        word: [(emojis[rank], lengths[rank]) for rank in ranks]
+        for word, ranks in artifact["index"].items()
+    }
+
+def _ensure_index():
+    if word_index is not None:
+        return
+    with _index_lock:
+        if word_index is not None:
+            return
+        artifact = _load_artifact()
+        if artifact is None:
+            artifact = _build_artifact()
+            _save_artifact(artifact)
+        _install(artifact)
+
+def _inflections(word):
+    """Words ``word`` could be an inflection of, or inflected into."""
+    forms = []
+    for suffix in INFLECTION_SUFFIXES:
+        forms.append(word + suffix)
+        stem = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stem) >= 3:
+            forms.append(stem)
+    if word.endswith(("ies", "ied")):
+        forms.append(word[:-3] + "y")
+    if word.endswith("y"):
+        forms.extend((word[:-1] + "ies", word[:-1] + "ied"))
+    return forms
+
+@lru_cache(maxsize=8192)
+def _resolve_word(word):
+    """Index word ``word`` is an inflection of and its weight, or (None, 0)."""
+    if word in word_index:
+        return word, 1.0
+    if len(word) < FUZZY_MIN_WORD_LENGTH:
+        return None, 0
+    for form in _inflections(word):
+        if form in word_index:
+            # Weighted a little under an exact match so exact names still win ties.
+            return form, 1 - abs(len(word) - len(form)) / max(len(word), len(form))
+    return None, 0
+
+def _query_weights(s, fuzzy):
+    words = set(get_words(s))
+    if not fuzzy:
+        return dict.fromkeys(words, 1)
+
+    _ensure_index()
+    weights = {}
+    for word in words:
+        if not word:
+            continue
+        match, similarity = _resolve_word(word)
+        if match is not None:
+            weights[match] = max(weights.get(match, 0), similarity)
+    return weights
+
+def _score(weights):
+    _ensure_index()
+    matches, lengths = {}, {}
+    for word, weight in weights.items():
+        for emoji, length in word_index.get(word, ()):
+            matches[emoji] = matches.get(emoji, 0) + weight
+            lengths[emoji] = length
+    return {emoji: score / lengths[emoji] for emoji, score in matches.items()}
+
+def search(s, fuzzy=False):
+    """Score every emoji sharing a word with ``s``.
+
+    With ``fuzzy`` words that aren't in any emoji name (e.g. "strawberries")
+    are matched to a name word they inflect (e.g. "strawberry"), weighted
+    slightly below an exact match.
+    """
+    candidates = _score(_query_weights(s, fuzzy))
+    return {emoji: candidates[emoji] for emoji in sorted(candidates, key=emoji_rank.__getitem__)}
+
+def top_emojis(s, k=1, fuzzy=False):
+    candidates = _score(_query_weights(s, fuzzy))
+    return heapq.nsmallest(k, candidates.items(), key=lambda x: (-x[1], emoji_rank[x[0]]))
+
+def get_top_emoji(s, fuzzy=False):
+    top = top_emojis(s, 1, fuzzy=fuzzy)
+    if top:
+        return top[0][0]
+    return None
+
+ANNOTATION_CACHE_SIZE = 4096
+_annotations = OrderedDict()
+_annotation_lock = threading.Lock()
+annotation_stats = {"hits": 0, "misses": 0}
+
+def normalize_item(s):
+    return ' '.join(word for word in get_words(s) if word)
+
+def annotate_item(s):
+    """Top emoji for a dish or meal name, memoised on its normalized text."""
+    key = normalize_item(s)
+    with _annotation_lock:
+        if key in _annotations:
+            _annotations.move_to_end(key)
+            annotation_stats["hits"] += 1
+            return _annotations[key]
+        annotation_stats["misses"] += 1
+
+    emoji = get_top_emoji(key, fuzzy=True) if key else None
+
+    with _annotation_lock:
+        _annotations[key] = emoji
+        while len(_annotations) > ANNOTATION_CACHE_SIZE:
+            _annotations.popitem(last=False)
+    return emoji
+
+def annotate_day(day_menu):
+    """{meal: [items]} -> {meal: {"emoji": ..., "items": [emoji or None, ...]}}"""
+    return {
+        meal: {"emoji": annotate_item(meal), "items": [annotate_item(item) for item in items]}
+        for meal, items in day_menu.items()
+    }
+
+def annotate_menu(menu):
+    """Annotate a whole {day: {meal: [items]}} menu as returned by MenuScraper.get_queens_menu."""
+    return {day: annotate_day(day_menu) for day, day_menu in menu.items()}
+
 if __name__ == '__main__':
-    for test in [
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Emoji lookup for menu items")
+    parser.add_argument("--rebuild-index", action="store_true", help=f"Rebuild {os.path.basename(index_path)} from codes.json")
+    parser.add_argument("--bench", action="store_true", help="Report per-query latency for exact and fuzzy matching")
+    parser.add_argument("--fuzzy", action="store_true", help="Use fuzzy matching for the sample queries")
+    args = parser.parse_args()
+
+    if args.rebuild_index:
+        artifact = rebuild_index()
+        print(f"Wrote {index_path}: {len(artifact['emojis'])} emoji, {len(artifact['index'])} words")
+        raise SystemExit(0)
+
+    tests = [
         "Strawberries & Cream",
         "Maple Waffle",
         "Honeycomb",
@@ -55,7 +259,31 @@ if __name__ == '__main__':
         "Coconut & Ube (v)",
         "Cherry & Damson Sorbet (v)",
         "Milk and Brownies",
-    ]:
-        s = search(test)
-        smax = sorted(s.items(), key=lambda x: -x[1])[:3]
-        print(test, smax)
\ No newline at end of file
+        # Fuzzy matching must leave these alone: not a shark, bell, desert or Solomon Islands.
+        "Lamb shank",
+        "Pork belly",
+        "Dessert",
+        "Grilled salmon fillet",
+    ]
+
+    if args.bench:
+        import time
+
+        rounds = 200
+        _ensure_index()
+        for fuzzy in (False, True):
+            _resolve_word.cache_clear()
+            started = time.perf_counter()
+            for test in tests:
+                search(test, fuzzy=fuzzy)
+            cold = (time.perf_counter() - started) / len(tests)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for test in tests:
+                    search(test, fuzzy=fuzzy)
+            warm = (time.perf_counter() - started) / (rounds * len(tests))
+            print(f"{'fuzzy' if fuzzy else 'exact'}: {cold * 1e6:.0f} us/query cold, {warm * 1e6:.0f} us/query warm")
+        raise SystemExit(0)
+
+    for test in tests:
+        print(test, top_emojis(test, 3, fuzzy=args.fuzzy))
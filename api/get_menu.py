@@ -1,16 +1,25 @@
 import os
 import re
-import pycurl
-from bs4 import BeautifulSoup
 from datetime import datetime
 from io import BytesIO
 
+from .menu_parsing import LEGACY_STRAINER, parse_html
+
 class MenuScraper:
-    def __init__(self, url):
+    # Parse only div.content instead of the whole page.
+    restricted_parse = True
+
+    def __init__(self, url, html=None):
         self.url = url
-        self.soup = self.get_soup()
+        # Saved HTML can be parsed offline, without pycurl.
+        self.soup = self.parse(html) if html is not None else self.get_soup()
+
+    def parse(self, html):
+        return parse_html(html, LEGACY_STRAINER if self.restricted_parse else None)
 
     def get_soup(self):
+        import pycurl
+
         buffer = BytesIO()
         c = pycurl.Curl()
         c.setopt(c.URL, self.url)
@@ -24,7 +33,7 @@ class MenuScraper:
             status_code = c.getinfo(pycurl.RESPONSE_CODE)
             if status_code == 200:
                 html = buffer.getvalue()
-                return BeautifulSoup(html, 'html.parser')
+                return self.parse(html)
             print(f"HTTP {status_code}: {buffer.getvalue()}")
         except pycurl.error as e:
             print(f"Request failed: {e}")
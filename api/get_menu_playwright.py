@@ -1,33 +1,128 @@
 import re
 import time
 from datetime import datetime
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
+
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+from .menu_parsing import MENU_STRAINER, parse_html
+
 
 class MenuScraper:
-    def __init__(self, url, headless=True, timeout_ms=10000):
+    # Subresources the fast load aborts; the menu is plain server-rendered HTML.
+    BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+    READY_SCRIPT = """() => !!document.querySelector("dl.accordion-wrapper")
+        || location.href.toLowerCase().includes("captcha")"""
+    # Parse only the accordion and week header instead of the whole page.
+    restricted_parse = True
+
+    def __init__(self, url, headless=True, timeout_ms=10000, browser_pool=None, fast_load=True, html=None, fetcher=None):
         self.url = url
         self.headless = headless
         self.timeout_ms = timeout_ms
-        self.soup = self.get_soup()
-
-    def get_soup(self):
+        # An optional browser_pool.BrowserPool; without one each scrape
+        # launches and tears down its own Chromium.
+        self.browser_pool = browser_pool
+        self.fast_load = fast_load
+        self.load_timings = {}
+        self.fetch_tier = None
+        # The page comes from ``html`` if given, else from a
+        # menu_fetcher.MenuFetcher, else straight from the browser. The
+        # fetcher already escalates to the browser when that can help, so
+        # its None is final.
+        if html is None and fetcher is not None:
+            result = fetcher.fetch(url)
+            html, self.fetch_tier = result.html, result.tier
+        elif html is None:
+            html = self.get_html()
+        self.html = html
+        self._soup = None
+
+    @property
+    def soup(self):
+        if self._soup is None and self.html is not None:
+            self._soup = self.parse(self.html)
+        return self._soup
+
+    def parse(self, html):
+        return parse_html(html, MENU_STRAINER if self.restricted_parse else None)
+
+    def _is_first_party(self, request_url):
+        host = urlparse(request_url).hostname or ""
+        site = (urlparse(self.url).hostname or "").removeprefix("www.")
+        return host == site or host.endswith("." + site)
+
+    def _route_request(self, route):
+        request = route.request
+        if request.resource_type in self.BLOCKED_RESOURCE_TYPES or (
+            request.resource_type == "script" and not self._is_first_party(request.url)
+        ):
+            self.load_timings["blocked"] += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def _load_page(self, page):
+        started = time.perf_counter()
+        self.load_timings = {"mode": "fast" if self.fast_load else "networkidle", "blocked": 0}
+
+        if not self.fast_load:
+            page.goto(self.url, wait_until="networkidle", timeout=self.timeout_ms)
+            self.load_timings["goto_ms"] = (time.perf_counter() - started) * 1000
+            self._wait_for_captcha_clear(page, max_wait_ms=self.timeout_ms)
+        else:
+            page.route("**/*", self._route_request)
+            page.goto(self.url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+            self.load_timings["goto_ms"] = (time.perf_counter() - started) * 1000
+            try:
+                page.wait_for_function(self.READY_SCRIPT, timeout=self.timeout_ms)
+                if "captcha" in page.url.lower():
+                    # Challenges need their own third-party scripts and
+                    # images, so stop blocking and let the page load fully.
+                    self.load_timings["captcha"] = True
+                    self.load_timings["mode"] = "fast, unblocked for captcha"
+                    captcha_started = time.perf_counter()
+                    page.unroute("**/*")
+                    page.reload(wait_until="networkidle", timeout=self.timeout_ms)
+                    self._wait_for_captcha_clear(page, max_wait_ms=self.timeout_ms)
+                    self.load_timings["captcha_cleared"] = "captcha" not in page.url.lower()
+                    self.load_timings["captcha_ms"] = (time.perf_counter() - captcha_started) * 1000
+                    page.wait_for_selector("dl.accordion-wrapper", state="attached", timeout=self.timeout_ms)
+            except PlaywrightTimeoutError:
+                # No menu published yet (or still captcha'd): parse what we have.
+                print("Menu accordion did not appear; using the page as loaded")
+
+        self.load_timings["ready_ms"] = (time.perf_counter() - started) * 1000
+        html = page.content()
+        self.load_timings["total_ms"] = (time.perf_counter() - started) * 1000
+        print(
+            f"Loaded menu page ({self.load_timings['mode']}) in {self.load_timings['total_ms']:.0f} ms, "
+            f"blocked {self.load_timings['blocked']} requests"
+        )
+        return html
+
+    def get_html(self):
         try:
+            if self.browser_pool is not None:
+                with self.browser_pool.page() as page:
+                    return self._load_page(page)
+
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=self.headless)
                 page = browser.new_page()
-                page.goto(self.url, wait_until="networkidle", timeout=self.timeout_ms)
-                self._wait_for_captcha_clear(page, max_wait_ms=self.timeout_ms)
-                html = page.content()
+                html = self._load_page(page)
                 browser.close()
-                return BeautifulSoup(html, "html.parser")
+                return html
         except PlaywrightTimeoutError as exc:
             print(f"Timeout loading page: {exc}")
         except Exception as exc:
             print(f"Request failed: {exc}")
         return None
 
+    def get_soup(self):
+        html = self.get_html()
+        return self.parse(html) if html is not None else None
+
     def _wait_for_captcha_clear(self, page, max_wait_ms=10000, poll_ms=1000):
         deadline = time.monotonic() + (max_wait_ms / 1000)
         while time.monotonic() < deadline:
@@ -97,8 +192,21 @@ class MenuScraper:
 
 
 if __name__ == "__main__":
-    menu_scraper = MenuScraper(
-        "https://www.queens.cam.ac.uk/life-at-queens/catering/dining-hall/weekly-menu/",
-        headless=True,
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape the Queens' menu with Playwright.")
+    parser.add_argument(
+        "--compare-load",
+        action="store_true",
+        help="Load the page in fast and networkidle modes and print both timings",
     )
-    print(menu_scraper.get_queens_menu())
+    args = parser.parse_args()
+
+    url = "https://www.queens.cam.ac.uk/life-at-queens/catering/dining-hall/weekly-menu/"
+    if args.compare_load:
+        for fast_load in (True, False):
+            scraper = MenuScraper(url, headless=True, fast_load=fast_load)
+            print(scraper.load_timings, f"days={len(scraper.get_queens_menu())}")
+    else:
+        menu_scraper = MenuScraper(url, headless=True)
+        print(menu_scraper.get_queens_menu())
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class GraphSession:
+    """Keep-alive session for Graph API calls, shared across threads.
+
+    Only connection failures are retried (by urllib3, with backoff): a read
+    error may mean Meta already acted on a POST, so that is left to callers.
+    Every call's latency is kept for ``latency_summary``. Settings not
+    passed in come from the GRAPH_* environment variables.
+    """
+
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None, connect_retries=None):
+        if pool_size is None:
+            pool_size = int(os.getenv("GRAPH_POOL_SIZE", "10"))
+        if connect_timeout is None:
+            connect_timeout = float(os.getenv("GRAPH_CONNECT_TIMEOUT", "5"))
+        if read_timeout is None:
+            read_timeout = float(os.getenv("GRAPH_READ_TIMEOUT", "30"))
+        if connect_retries is None:
+            connect_retries = int(os.getenv("GRAPH_CONNECT_RETRIES", "3"))
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=connect_retries,
+            connect=connect_retries,
+            read=0,
+            status=0,
+            other=0,
+            allowed_methods=None,
+            backoff_factor=0.5,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.latencies = deque(maxlen=1000)
+        self.stats = {"requests": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, timeout=None, **kwargs):
+        started = time.perf_counter()
+        status = None
+        try:
+            response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["errors"] += status is None
+                self.latencies.append((method, urlparse(url).path, status, elapsed))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def latency_summary(self):
+        with self._lock:
+            timings = sorted(elapsed for _, _, _, elapsed in self.latencies)
+            stats = dict(self.stats)
+        if not timings:
+            return stats
+        return {
+            **stats,
+            "p50_ms": round(timings[len(timings) // 2] * 1000, 1),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 1),
+            "max_ms": round(timings[-1] * 1000, 1),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def get_graph_session():
+    """Return the process-wide GraphSession, creating it on first use."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = GraphSession()
+        return _shared_session
@@ -0,0 +1,136 @@
+import os
+import time
+from io import BytesIO
+
+from PIL import features
+
+
+class EncodedImage:
+    def __init__(self, data, image_format, extension, content_type, quality, encode_seconds):
+        self.data = data
+        self.format = image_format
+        self.extension = extension
+        self.content_type = content_type
+        self.quality = quality
+        self.encode_seconds = encode_seconds
+
+    @property
+    def size(self):
+        return len(self.data)
+
+
+class ImageEncoder:
+    """Encodes rendered posts, optionally searching quality to fit a byte budget.
+
+    Instagram only accepts JPEG, so posts always use ``from_env``; WEBP is
+    only for the web copies ``web_from_env`` configures.
+    """
+
+    FORMATS = {
+        "JPEG": (".jpg", "image/jpeg"),
+        "WEBP": (".webp", "image/webp"),
+    }
+
+    def __init__(self, image_format="JPEG", quality=75, max_bytes=None, min_quality=40, optimize=True, progressive=False):
+        image_format = image_format.upper()
+        if image_format not in self.FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        if image_format == "WEBP" and not features.check("webp"):
+            raise ValueError("Pillow was built without WebP support")
+        if not 1 <= min_quality <= quality <= 100:
+            raise ValueError("Expected 1 <= min_quality <= quality <= 100")
+
+        self.format = image_format
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.min_quality = min_quality
+        self.optimize = optimize
+        self.progressive = progressive
+
+    @classmethod
+    def from_env(cls):
+        image_format = os.getenv("POST_IMAGE_FORMAT", "JPEG")
+        if image_format.upper() != "JPEG":
+            raise ValueError(
+                f"POST_IMAGE_FORMAT={image_format}: Instagram only accepts JPEG; set WEB_IMAGE_FORMAT for web copies"
+            )
+        max_bytes = os.getenv("POST_IMAGE_MAX_BYTES")
+        return cls(
+            image_format=image_format,
+            quality=int(os.getenv("POST_IMAGE_QUALITY", "75")),
+            max_bytes=int(max_bytes) if max_bytes else None,
+            min_quality=int(os.getenv("POST_IMAGE_MIN_QUALITY", "40")),
+            optimize=os.getenv("POST_IMAGE_OPTIMIZE", "true").strip().lower() in {"1", "true", "yes"},
+            progressive=os.getenv("POST_IMAGE_PROGRESSIVE", "false").strip().lower() in {"1", "true", "yes"},
+        )
+
+    @classmethod
+    def web_from_env(cls):
+        """Encoder for the web copies published beside the menu JSON, or None if WEB_IMAGE_FORMAT is unset."""
+        image_format = os.getenv("WEB_IMAGE_FORMAT")
+        if not image_format:
+            return None
+        return cls(image_format=image_format, quality=int(os.getenv("WEB_IMAGE_QUALITY", "75")))
+
+    @property
+    def extension(self):
+        return self.FORMATS[self.format][0]
+
+    @property
+    def content_type(self):
+        return self.FORMATS[self.format][1]
+
+    def settings(self):
+        return {
+            "format": self.format,
+            "quality": self.quality,
+            "max_bytes": self.max_bytes,
+            "min_quality": self.min_quality,
+            "optimize": self.optimize,
+            "progressive": self.progressive,
+        }
+
+    def _encode_at(self, img, quality):
+        buffer = BytesIO()
+        if self.format == "JPEG":
+            img.save(buffer, "JPEG", quality=quality, optimize=self.optimize, progressive=self.progressive)
+        else:
+            img.save(buffer, "WEBP", quality=quality, method=4)
+        return buffer.getvalue()
+
+    def encode(self, img):
+        """Encode ``img`` at the highest quality within ``max_bytes``.
+
+        Quality is binary-searched between min_quality and quality using
+        in-memory encodes; if even min_quality is over budget that encode is
+        returned anyway.
+        """
+        started = time.perf_counter()
+        quality = self.quality
+        data = self._encode_at(img, quality)
+
+        if self.max_bytes and len(data) > self.max_bytes:
+            best = None
+            lo, hi = self.min_quality, self.quality - 1
+            while lo <= hi:
+                candidate_quality = (lo + hi) // 2
+                candidate = self._encode_at(img, candidate_quality)
+                if len(candidate) <= self.max_bytes:
+                    best = candidate_quality, candidate
+                    lo = candidate_quality + 1
+                else:
+                    hi = candidate_quality - 1
+            if best is not None:
+                quality, data = best
+            elif quality != self.min_quality:
+                quality = self.min_quality
+                data = self._encode_at(img, quality)
+
+        return EncodedImage(
+            data,
+            self.format,
+            self.extension,
+            self.content_type,
+            quality,
+            time.perf_counter() - started,
+        )
@@ -13,7 +13,6 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 users_file = os.path.join(current_dir, 'users.json')
 custom_details_file = os.path.join(current_dir, 'custom_details.json')
 EPOCH_ISO = "1970-01-01T00:00:00"
-WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
 
 env_path = os.path.abspath(os.path.join(current_dir, "..", ".env"))
@@ -38,6 +37,9 @@ app.secret_key = 'your_secret_key'
 app.request_class = R
 app.wsgi_app = ProxyFix(app.wsgi_app)
 
+# Parse fonts and scale the crest once at startup rather than on the first post.
+PostGenerator(base_url=PUBLIC_BASE_URL, emoji=True).warm_up()
+
 
 def _load_json(path, default):
     try:
@@ -83,11 +85,7 @@ def _is_update_authorized(user_id, provided_token):
 
 
 def _post_weekly(api, pg, menu_week, menu):
-    menu_names = []
-    for index, day in enumerate(WEEKDAYS):
-        day_date = menu_week + timedelta(days=index)
-        menu_names.append(pg.generate_image(day, day_date.strftime("%d %B"), menu.get(day, {})))
-    api.post_carousel(menu_names)
+    api.post_carousel(pg.generate_week(menu_week, menu))
 
 
 def _post_daily(api, pg, menu):
@@ -228,7 +226,7 @@ def update_menu():
 
     user_custom_details = _ensure_user_custom_state(user_id)
     api = InstagramAPI(user_id=user_id, access_token=access_token)
-    pg = PostGenerator(base_url=PUBLIC_BASE_URL)
+    pg = PostGenerator(base_url=PUBLIC_BASE_URL, emoji=True)
 
     posted_weekly, posted_daily = False, False
     today_floor = _today_floor_iso()
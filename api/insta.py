@@ -1,6 +1,10 @@
+import json
+import os
 import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from urllib.parse import urlencode
 
-import requests
+from .graph_session import get_graph_session
 
 
 class InstagramAPI:
@@ -9,19 +13,86 @@ class InstagramAPI:
     MEDIA_CREATE_RETRIES = 4
     MEDIA_CREATE_RETRY_DELAY_SECONDS = 2
     TRANSIENT_ERROR_CODES = {1, 2, 4, 17, 32, 341}
+    MAX_BATCH_SIZE = 50
 
-    def __init__(self, user_id, access_token):
+    def __init__(self, user_id, access_token, session=None, api_url=None):
         self.user_id = user_id
         self.access_token = access_token
+        self.session = session or get_graph_session()
+        # GRAPH_API_URL can point at a local stand-in for the Graph API.
+        self.api_url = (api_url or os.getenv("GRAPH_API_URL") or self.FB_API_URL).rstrip("/")
+        self.carousel_child_workers = int(os.getenv("CAROUSEL_CHILD_WORKERS", "7"))
+        # Create carousel children with one batch request instead of one call each.
+        self.use_batch = os.getenv("GRAPH_USE_BATCH", "false").strip().lower() in {"1", "true", "yes"}
 
     def _get(self, path, **params):
-        response = requests.get(f"{self.FB_API_URL}/{path}", params=params)
+        response = self.session.get(f"{self.api_url}/{path}", params=params)
         return response.json()
 
     def _post(self, path, **data):
-        response = requests.post(f"{self.FB_API_URL}/{path}", data=data)
+        response = self.session.post(f"{self.api_url}/{path}", data=data)
         return response.json()
 
+    def batch(self, calls):
+        """Send ``calls`` as Graph batch requests; returns one payload per call.
+
+        Each call is a dict with ``method``, ``relative_url`` and an optional
+        ``body`` dict. Items Meta skipped (a null result) come back as None;
+        if the whole batch errors, every item gets that error payload.
+        """
+        results = []
+        for start in range(0, len(calls), self.MAX_BATCH_SIZE):
+            chunk = calls[start:start + self.MAX_BATCH_SIZE]
+            encoded = [
+                {
+                    "method": call["method"],
+                    "relative_url": call["relative_url"],
+                    **({"body": urlencode(call["body"])} if call.get("body") else {}),
+                }
+                for call in chunk
+            ]
+            payload = self._post("", batch=json.dumps(encoded), include_headers="false", access_token=self.access_token)
+            if not isinstance(payload, list):
+                results.extend([payload] * len(chunk))
+                continue
+            for item in payload:
+                if item is None:
+                    results.append(None)
+                    continue
+                try:
+                    results.append(json.loads(item.get("body") or "{}"))
+                except ValueError:
+                    results.append({"error": {"message": f"unparseable batch body (HTTP {item.get('code')})"}})
+        return results
+
+    def batch_with_retries(self, calls, label="batch item"):
+        """Run ``calls`` through ``batch``, resending only items that failed transiently.
+
+        Returns one payload per call, in order; an item that still has no
+        ``id`` after MEDIA_CREATE_RETRIES rounds keeps its last payload.
+        """
+        results = [None] * len(calls)
+        pending = list(range(len(calls)))
+        for attempt in range(1, self.MEDIA_CREATE_RETRIES + 1):
+            for index, payload in zip(pending, self.batch([calls[i] for i in pending])):
+                results[index] = payload
+            # A null item was never run, so it is always safe to resend.
+            pending = [
+                index
+                for index in pending
+                if results[index] is None
+                or (not results[index].get("id") and self._is_transient(results[index].get("error", {})))
+            ]
+            if not pending or attempt >= self.MEDIA_CREATE_RETRIES:
+                break
+            print(
+                f"Transient {label} failures for items {[i + 1 for i in pending]} "
+                f"(attempt {attempt}/{self.MEDIA_CREATE_RETRIES}); retrying in "
+                f"{self.MEDIA_CREATE_RETRY_DELAY_SECONDS}s"
+            )
+            time.sleep(self.MEDIA_CREATE_RETRY_DELAY_SECONDS)
+        return [payload or {"error": {"message": "skipped by batch"}} for payload in results]
+
     def validate_code(self, code, app_id, app_secret, redirect_uri):
         return self._get(
             "oauth/access_token",
@@ -55,12 +126,15 @@ class InstagramAPI:
 
         return None
 
-    def create_instagram_media_object(self, image_url, caption, is_story=False):
+    def _check_image_url(self, image_url):
         if not isinstance(image_url, str) or not image_url.startswith(("http://", "https://")):
             raise ValueError(
                 "image_url must be a public http(s) URL reachable by Meta Graph API"
             )
 
+    def create_instagram_media_object(self, image_url, caption, is_story=False):
+        self._check_image_url(image_url)
+
         params = {
             "image_url": image_url,
             "caption": caption,
@@ -69,26 +143,34 @@ class InstagramAPI:
         if is_story:
             params["media_type"] = "STORIES"
 
+        media_id, _, _ = self._create_media_with_retries(params)
+        return media_id
+
+    def _is_transient(self, error):
+        return bool(error.get("is_transient")) or error.get("code") in self.TRANSIENT_ERROR_CODES
+
+    def _create_media_with_retries(self, params, label="media"):
+        """Create one container, retrying transient errors; returns (media_id, attempts, last_error)."""
+        error = {}
         for attempt in range(1, self.MEDIA_CREATE_RETRIES + 1):
             payload = self._post(f"{self.user_id}/media", **params)
             print(payload)
 
             media_id = payload.get("id")
             if media_id:
-                return media_id
+                return media_id, attempt, None
 
             error = payload.get("error", {})
-            is_transient = bool(error.get("is_transient")) or error.get("code") in self.TRANSIENT_ERROR_CODES
-            if attempt >= self.MEDIA_CREATE_RETRIES or not is_transient:
-                return None
+            if attempt >= self.MEDIA_CREATE_RETRIES or not self._is_transient(error):
+                return None, attempt, error
 
             print(
-                f"Transient media link failure (attempt {attempt}/{self.MEDIA_CREATE_RETRIES}); retrying in "
+                f"Transient {label} link failure (attempt {attempt}/{self.MEDIA_CREATE_RETRIES}); retrying in "
                 f"{self.MEDIA_CREATE_RETRY_DELAY_SECONDS}s"
             )
             time.sleep(self.MEDIA_CREATE_RETRY_DELAY_SECONDS)
 
-        return None
+        return None, self.MEDIA_CREATE_RETRIES, error
 
     def publish_instagram_post(self, media_object_id):
         return self._post(
@@ -109,14 +191,71 @@ class InstagramAPI:
         payload = self._post(f"{self.user_id}/media", **params)
         return payload.get("id")
 
-    def post_carousel(self, imgs, caption=""):
+    def _create_carousel_child(self, image_url, index, total):
+        self._check_image_url(image_url)
+        params = {"image_url": image_url, "caption": "", "access_token": self.access_token}
+        media_id, attempts, error = self._create_media_with_retries(params, label=f"carousel image {index}/{total}")
+        if not media_id:
+            message = (error or {}).get("message", "no id returned")
+            raise ValueError(f"image {index}/{total} after {attempts} attempts: {message}")
+        return media_id
+
+    def create_carousel_children(self, imgs, max_workers=None):
+        """Create the child containers concurrently, returning their ids in ``imgs`` order.
+
+        Each child retries transient errors on its own. The first child to
+        fail for good stops those not yet started, and a single ValueError
+        lists every child that failed.
+        """
+        workers = max(1, min(max_workers or self.carousel_child_workers, len(imgs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self._create_carousel_child, img, idx, len(imgs))
+                for idx, img in enumerate(imgs, start=1)
+            ]
+            _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+
+        failures = [
+            str(future.exception())
+            for future in futures
+            if not future.cancelled() and future.exception() is not None
+        ]
+        if failures:
+            raise ValueError(f"Failed to link carousel images: {'; '.join(failures)}")
+        return [future.result() for future in futures]
+
+    def create_carousel_children_batch(self, imgs):
+        """Like create_carousel_children, but with all children in one batch request."""
+        for img in imgs:
+            self._check_image_url(img)
+        calls = [
+            {"method": "POST", "relative_url": f"{self.user_id}/media", "body": {"image_url": img, "caption": ""}}
+            for img in imgs
+        ]
+        results = self.batch_with_retries(calls, label="carousel image")
+        print(results)
+
+        failures = [
+            f"image {index}/{len(imgs)}: {payload.get('error', {}).get('message', 'no id returned')}"
+            for index, payload in enumerate(results, start=1)
+            if not payload.get("id")
+        ]
+        if failures:
+            raise ValueError(f"Failed to link carousel images: {'; '.join(failures)}")
+        return [payload["id"] for payload in results]
+
+    def post_carousel(self, imgs, caption="", max_workers=None, use_batch=None):
         # Step 1: Create media objects for each image
-        media_ids = []
-        for idx, img in enumerate(imgs, start=1):
-            media_id = self.create_instagram_media_object(img, "")
-            if not media_id:
-                raise ValueError(f"Failed to link carousel image {idx}/{len(imgs)} after retries.")
-            media_ids.append(media_id)
+        if use_batch is None:
+            use_batch = self.use_batch
+        if not imgs:
+            media_ids = []
+        elif use_batch:
+            media_ids = self.create_carousel_children_batch(imgs)
+        else:
+            media_ids = self.create_carousel_children(imgs, max_workers=max_workers)
 
         if not media_ids:
             raise ValueError("No media objects were created successfully.")
@@ -127,4 +266,4 @@ class InstagramAPI:
             raise ValueError("Failed to create carousel container.")
 
         # Step 3: Publish the carousel post
-        return self.publish_instagram_post(carousel_id)
\ No newline at end of file
+        return self.publish_instagram_post(carousel_id)
@@ -1,17 +1,134 @@
+import atexit
+import multiprocessing
 import os
-import random
-from uuid import uuid1
-
-from PIL import Image, ImageDraw, ImageFont
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from PIL import Image, ImageDraw
+
+from .get_emoji import annotate_day
+from .image_encoder import ImageEncoder
+from .render_assets import (
+    get_banner_strip,
+    get_crest,
+    get_font,
+    get_rounded_mask,
+    get_template_canvas,
+    warm_assets,
+)
+from .render_cache import MemoryRenderCache, RenderCache, content_key
+from .text_layout import layout_menu
 
 DEFAULT_PUBLIC_BASE_URL = "https://tsg36.soc.srcf.net"
+# Bump whenever the drawing code changes so cached renders are not reused.
+RENDER_VERSION = 1
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Shared by every generator in "memory" mode so a long-running publisher
+# keeps recent renders across cycles without writing them to disk.
+_memory_renders = MemoryRenderCache(max_items=int(os.getenv("RENDER_MEMORY_CACHE_ITEMS", "16")))
+
+# One long-lived pool per process, created on first use: each worker pays
+# for warming the feed assets once rather than on every weekly render.
+_week_pool = None
+_week_pool_workers = 0
+_week_pool_lock = threading.Lock()
+
+
+def _available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_week_worker(generator):
+    generator.warm_up(story=False)
+
+
+def _render_week_day(generator, job):
+    result = generator._render_image(*job)
+    return result, generator.last_fit
+
+
+def _get_week_pool(workers, generator):
+    global _week_pool, _week_pool_workers
+    with _week_pool_lock:
+        if _week_pool is None or _week_pool_workers != workers:
+            if _week_pool is not None:
+                _week_pool.shutdown(wait=False, cancel_futures=True)
+            # Spawn, not fork: callers include the threaded Flask server and a
+            # publisher holding a live Playwright browser.
+            _week_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_week_worker,
+                initargs=(generator,),
+            )
+            _week_pool_workers = workers
+        return _week_pool
+
+
+def shutdown_week_pool():
+    global _week_pool, _week_pool_workers
+    with _week_pool_lock:
+        if _week_pool is not None:
+            _week_pool.shutdown(wait=False, cancel_futures=True)
+        _week_pool, _week_pool_workers = None, 0
+
+
+atexit.register(shutdown_week_pool)
+
+
+class RenderedImage:
+    """An encoded post held in memory, as returned in "memory" output mode."""
+
+    def __init__(self, data, key, extension=".jpg", content_type="image/jpeg", quality=None, encode_seconds=None):
+        self.data = data
+        self.key = key
+        self.extension = extension
+        self.content_type = content_type
+        self.quality = quality
+        self.encode_seconds = encode_seconds
+
+    @property
+    def name(self):
+        return f"{self.key}{self.extension}"
+
+    @property
+    def size(self):
+        return len(self.data)
 
 
 class PostGenerator:
-    def __init__(self, base_url=None):
+    # Decode banner JPEGs at a reduced DCT scale and keep them RGB; set to
+    # False to reproduce the original full-resolution RGBA decode.
+    reduced_banner_decode = True
+    # Set to True to start each render from a cached white+banner+crest
+    # canvas. Off by default: it saves only ~0.5 ms of a ~16 ms feed render
+    # (see --bench-week) for ~3.5 MiB per cached canvas, up to
+    # TEMPLATE_CACHE_SIZE of them.
+    cache_templates = False
+
+    FEED_SIZE = (1080, 1080)
+    FEED_FONT_SIZES = {"header": 60, "date": 30, "section": 40, "body": 24}
+    FEED_CREST_DIVISOR = 5
+    STORY_SIZE = (1080, 1920)
+    STORY_FONT_SIZES = {"header": 70, "date": 30, "section": 50, "body": 35}
+    STORY_CREST_DIVISOR = 6
+    MIN_BODY_FONT_SIZE = 12
+    FOOTER_TEXT = "Bon Appétit!"
+
+    def __init__(self, base_url=None, week_workers=None, auto_fit=True, output="file", encoder=None, emoji=False):
         current_dir = os.path.dirname(os.path.abspath(__file__))
 
         self.font_path = os.path.join(current_dir, "static", "assets", "fonts", "inriasans", "InriaSans-Regular.ttf")
+        self.emoji_font_path = os.path.join(
+            current_dir, "static", "assets", "fonts", "notocolour", "NotoEmoji-VariableFont_wght.ttf"
+        )
         self.banners_folder = os.path.join(current_dir, "static", "assets", "Images", "banners")
         self.crest_img = os.path.join(current_dir, "static", "assets", "Images", "crest.png")
         self.save_folder = os.path.join(current_dir, "static", "QueensMenus")
@@ -21,31 +138,138 @@ class PostGenerator:
             configured_base_url = os.getenv("PUBLIC_BASE_URL") or os.getenv("HOST") or DEFAULT_PUBLIC_BASE_URL
         self.base_url = configured_base_url.rstrip("/")
 
-        os.makedirs(self.save_folder, exist_ok=True)
+        # "file" saves JPEGs under static/QueensMenus and returns their URL or
+        # path; "memory" returns RenderedImage objects and never touches disk.
+        if output not in {"file", "memory"}:
+            raise ValueError(f"Unknown output mode: {output}")
+        self.output = output
+        self.encoder = encoder or ImageEncoder.from_env()
+        # Decorate section headers and items with emoji from get_emoji.
+        self.emoji = emoji
+        self.last_encode = None
+
+        # Weeks render sequentially unless RENDER_WORKERS (or week_workers)
+        # asks for a pool; a warm sequential week takes ~0.1 s, while each
+        # worker costs ~200 MiB and a second to warm on first use.
+        if week_workers is None:
+            week_workers = int(os.getenv("RENDER_WORKERS") or "1")
+        self.week_workers = max(1, min(week_workers, len(WEEKDAYS), _available_cpus()))
+
+        # Auto-fit shrinks the section/body fonts only when the menu would
+        # otherwise run into the footer; fit_stats counts how often it does.
+        self.auto_fit = auto_fit
+        self.last_fit = None
+        self.fit_stats = {"renders": 0, "shrunk": 0}
+
+        if self.output == "file":
+            os.makedirs(self.save_folder, exist_ok=True)
+        self.render_cache = RenderCache(
+            self.save_folder,
+            max_files=int(os.getenv("RENDER_CACHE_MAX_FILES", "200")),
+            max_age_seconds=float(os.getenv("RENDER_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+        )
 
     def _text_size(self, draw, text, font):
         left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
         return right - left, bottom - top
 
     def _load_fonts(self, sizes):
-        return {name: ImageFont.truetype(self.font_path, size) for name, size in sizes.items()}
-
-    def _pick_banner(self, image_size, banner_height):
-        banners = [f for f in os.listdir(self.banners_folder) if os.path.isfile(os.path.join(self.banners_folder, f))]
-        banner = Image.open(os.path.join(self.banners_folder, random.choice(banners))).convert("RGBA")
-        banner = banner.resize((image_size[0], int(image_size[0] * banner.height / banner.width)))
-        top = (banner.height - banner_height) // 2
-        return banner.crop((0, top, image_size[0], top + banner_height))
+        return {name: get_font(self.font_path, size) for name, size in sizes.items()}
+
+    def warm_up(self, story=True):
+        """Load the fonts and crest variants used by the feed (and story) templates."""
+        templates = [(self.FEED_FONT_SIZES, self.FEED_SIZE, self.FEED_CREST_DIVISOR)]
+        if story:
+            templates.append((self.STORY_FONT_SIZES, self.STORY_SIZE, self.STORY_CREST_DIVISOR))
+        if self.emoji:
+            warm_assets(
+                self.emoji_font_path,
+                font_sizes={sizes[name] for sizes, _, _ in templates for name in ("section", "body")},
+            )
+        warm_assets(
+            self.font_path,
+            font_sizes={size for sizes, _, _ in templates for size in sizes.values()},
+            crest_path=self.crest_img,
+            crest_bounds=[self._crest_bounds(image_size, divisor) for _, image_size, divisor in templates],
+        )
+
+    def _choose_banner(self, seed_key):
+        banners = sorted(
+            f for f in os.listdir(self.banners_folder) if os.path.isfile(os.path.join(self.banners_folder, f))
+        )
+        return banners[int(seed_key, 16) % len(banners)]
+
+    def _render_key(self, kind, day, date_text, menu_dict, auto_fit):
+        """Return (cache key, banner file) for a render.
+
+        The banner is derived from the content so identical inputs always
+        produce the same image, and asset mtimes are folded into the key so
+        replacing a font, crest or banner invalidates old renders.
+        """
+        base_key = content_key(kind, day, date_text, menu_dict)
+        banner_name = self._choose_banner(base_key)
+        banner_path = os.path.join(self.banners_folder, banner_name)
+        assets = [
+            (path, os.path.getmtime(path))
+            for path in (self.font_path, self.emoji_font_path, self.crest_img, banner_path)
+        ]
+        options = {
+            "version": RENDER_VERSION,
+            "auto_fit": auto_fit,
+            "reduced_banner_decode": self.reduced_banner_decode,
+            "fonts": self.FEED_FONT_SIZES if kind == "feed" else self.STORY_FONT_SIZES,
+            "encoder": self.encoder.settings(),
+            "emoji": self.emoji,
+        }
+        return content_key(base_key, banner_name, assets, options), banner_name
+
+    def _pick_banner(self, image_size, banner_height, banner_name):
+        return get_banner_strip(
+            os.path.join(self.banners_folder, banner_name),
+            image_size[0],
+            banner_height,
+            reduced=self.reduced_banner_decode,
+        )
+
+    def _paste_banner(self, img, banner):
+        img.paste(banner, (0, 0), banner if banner.mode == "RGBA" else None)
+
+    def _crest_bounds(self, image_size, crest_divisor):
+        return image_size[0], image_size[1] / crest_divisor
 
     def _place_crest(self, img, image_size, banner_height, crest_divisor, y_pos):
-        crest = Image.open(self.crest_img)
-        crest_width, crest_height = crest.size
-        crest_scale = min(image_size[0] / crest_width, image_size[1] / crest_height / crest_divisor)
-        crest = crest.resize((int(crest_width * crest_scale), int(crest_height * crest_scale)))
+        crest = get_crest(self.crest_img, *self._crest_bounds(image_size, crest_divisor))
         crest_x = image_size[0] - crest.width - 20
         img.paste(crest, (crest_x, y_pos), crest)
         return crest.height
 
+    def _base_canvas(self, image_size, banner_height, banner_name, crest_divisor, crest_y):
+        """Return a fresh copy of the white canvas with banner and crest, plus the crest height."""
+
+        def build():
+            img = Image.new("RGB", image_size, color="white")
+            self._paste_banner(img, self._pick_banner(image_size, banner_height, banner_name))
+            crest_h = self._place_crest(img, image_size, banner_height, crest_divisor, crest_y)
+            return img, crest_h
+
+        if not self.cache_templates:
+            return build()
+
+        banner_path = os.path.join(self.banners_folder, banner_name)
+        key = (
+            image_size,
+            banner_height,
+            banner_path,
+            os.path.getmtime(banner_path),
+            self.crest_img,
+            os.path.getmtime(self.crest_img),
+            crest_divisor,
+            crest_y,
+            self.reduced_banner_decode,
+        )
+        canvas, crest_h = get_template_canvas(key, build)
+        return canvas.copy(), crest_h
+
     def _draw_header_box(self, img, draw, title_text, date_text, banner_height, fonts, date_gap=0):
         title_width, title_height = self._text_size(draw, title_text, fonts["header"])
         date_width, date_height = self._text_size(draw, date_text, fonts["date"])
@@ -56,11 +280,7 @@ class PostGenerator:
         x0 = (img.width - box_w) // 2
         y0 = (banner_height - box_h) // 2
 
-        mask = Image.new("L", (box_w, box_h), 0)
-        ImageDraw.Draw(mask).rounded_rectangle([0, 0, box_w, box_h], radius=20, fill=255)
-        rounded = Image.new("RGBA", (box_w, box_h), "white")
-        rounded.putalpha(mask)
-        img.paste(rounded, (x0, y0), rounded)
+        img.paste("white", (x0, y0, x0 + box_w, y0 + box_h), get_rounded_mask(box_w, box_h, 20))
 
         draw.text((x0 + padding, y0 + padding), title_text, fill="black", font=fonts["header"])
         date_x = x0 + (box_w - date_width) // 2
@@ -69,94 +289,209 @@ class PostGenerator:
 
         return title_height
 
-    def _iter_menu_lines(self, menu_dict):
-        for header, items in menu_dict.items():
-            yield f"{header}:", True
-            for item in items:
-                yield f"• {item}", False
-
-    def _wrap_text(self, draw, text, font, max_width):
-        if not text.strip():
-            return [""]
-
-        words = text.split()
-        lines, line = [], ""
-        for word in words:
-            test = f"{line}{word} "
-            if self._text_size(draw, test, font)[0] <= max_width:
-                line = test
+    def _section_size(self, base_sizes, body_size):
+        return max(1, round(body_size * base_sizes["section"] / base_sizes["body"]))
+
+    def _menu_layout(self, menu_dict, annotations, start_y, image_width, base_sizes, body_size):
+        sizes = {"section": self._section_size(base_sizes, body_size), "body": body_size}
+        fonts = self._load_fonts(sizes)
+        if annotations is not None:
+            fonts.update({f"{name}_emoji": get_font(self.emoji_font_path, size) for name, size in sizes.items()})
+        return layout_menu(menu_dict, fonts, start_y, image_width, annotations=annotations)
+
+    def _fit_menu_layout(self, menu_dict, annotations, start_y, limit_y, base_sizes, image_width):
+        """Binary-search the largest body size whose layout ends above ``limit_y``.
+
+        Only layouts are measured here; the caller draws the winner once.
+        """
+        layout = self._menu_layout(menu_dict, annotations, start_y, image_width, base_sizes, base_sizes["body"])
+        if not layout.overflows(limit_y):
+            return layout, base_sizes["body"]
+
+        best = None
+        lo, hi = self.MIN_BODY_FONT_SIZE, base_sizes["body"] - 1
+        while lo <= hi:
+            body_size = (lo + hi) // 2
+            candidate = self._menu_layout(menu_dict, annotations, start_y, image_width, base_sizes, body_size)
+            if candidate.overflows(limit_y):
+                hi = body_size - 1
             else:
-                lines.append(line)
-                line = f"{word} "
-        lines.append(line)
-        return lines
-
-    def _draw_wrapped_text(self, draw, text, x, y, font, max_width, spacing=5):
-        for line in self._wrap_text(draw, text, font, max_width):
-            draw.text((x, y), line, fill="black", font=font)
-            y += self._text_size(draw, line or " ", font)[1] + spacing
-        return y
-
-    def _draw_menu_block(self, draw, menu_dict, start_y, fonts, image_width):
-        margin = 50
-        max_width = image_width - (2 * margin)
-        y = start_y
-
-        for text, is_header in self._iter_menu_lines(menu_dict):
-            if is_header:
-                draw.line([(margin, y + 10), (margin + max_width, y + 10)], fill="black", width=2)
-                y += 20
-                y = self._draw_wrapped_text(draw, text, margin, y, fonts["section"], max_width)
-            else:
-                y = self._draw_wrapped_text(draw, text, margin, y, fonts["body"], max_width)
-            y += 10
-
-    def _save(self, img):
-        name = f"{uuid1()}.jpg"
-        path = os.path.join(self.save_folder, name)
-        img.save(path, "JPEG")
-        return self._public_url(name, path)
-
-    def generate_image(self, day, date_text, menu_dict):
-        image_size = (1080, 1080)
+                best = candidate, body_size
+                lo = body_size + 1
+
+        if best is None:
+            body_size = self.MIN_BODY_FONT_SIZE
+            print(f"Menu overflows even at body size {body_size}")
+            best = self._menu_layout(menu_dict, annotations, start_y, image_width, base_sizes, body_size), body_size
+        return best
+
+    def _draw_menu_block(self, draw, menu_dict, start_y, limit_y, base_sizes, image_width, auto_fit):
+        annotations = annotate_day(menu_dict) if self.emoji else None
+        if auto_fit:
+            layout, body_size = self._fit_menu_layout(menu_dict, annotations, start_y, limit_y, base_sizes, image_width)
+        else:
+            body_size = base_sizes["body"]
+            layout = self._menu_layout(menu_dict, annotations, start_y, image_width, base_sizes, body_size)
+        layout.draw(draw)
+
+        fit = {
+            "section": self._section_size(base_sizes, body_size),
+            "body": body_size,
+            "shrunk": body_size < base_sizes["body"],
+            "overflow": layout.overflows(limit_y),
+        }
+        if fit["shrunk"]:
+            print(f"Menu shrunk to fit: section={fit['section']}, body={fit['body']}")
+        self._record_fit(fit)
+        return layout
+
+    def _record_fit(self, fit):
+        self.last_fit = fit
+        self.fit_stats["renders"] += 1
+        if fit["shrunk"]:
+            self.fit_stats["shrunk"] += 1
+
+    def _draw_footer(self, draw, image_size, y, font):
+        footer_w, _ = self._text_size(draw, self.FOOTER_TEXT, font)
+        draw.text(((image_size[0] - footer_w) / 2, y), self.FOOTER_TEXT, fill="black", font=font)
+
+    def _cached(self, key):
+        if self.output == "memory":
+            result = _memory_renders.get(key)
+        else:
+            path = self.render_cache.lookup(key, self.encoder.extension)
+            result = self._public_url(os.path.basename(path), path) if path else None
+        if result is not None:
+            self.last_fit = None
+            self.last_encode = None
+        return result
+
+    def _save(self, img, key):
+        encoded = self.encoder.encode(img)
+        self.last_encode = {
+            "format": encoded.format,
+            "quality": encoded.quality,
+            "size": encoded.size,
+            "encode_seconds": encoded.encode_seconds,
+        }
+        print(
+            f"Encoded {encoded.format} q={encoded.quality}: {encoded.size / 1024:.1f} KiB "
+            f"in {encoded.encode_seconds * 1000:.0f} ms"
+        )
+
+        if self.output == "memory":
+            result = RenderedImage(
+                encoded.data,
+                key,
+                encoded.extension,
+                encoded.content_type,
+                quality=encoded.quality,
+                encode_seconds=encoded.encode_seconds,
+            )
+            _memory_renders.put(key, result)
+            return result
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(encoded.data)
+
+        path = self.render_cache.store(key, encoded.extension, write)
+        return self._public_url(os.path.basename(path), path)
+
+    def generate_image(self, day, date_text, menu_dict, auto_fit=None):
+        auto_fit = self.auto_fit if auto_fit is None else auto_fit
+        key, banner_name = self._render_key("feed", day, date_text, menu_dict, auto_fit)
+        cached = self._cached(key)
+        if cached:
+            return cached
+        return self._render_image(key, banner_name, day, date_text, menu_dict, auto_fit)
+
+    def _render_image(self, key, banner_name, day, date_text, menu_dict, auto_fit):
+        image_size = self.FEED_SIZE
         banner_height = int(image_size[1] / 4.3)
-        img = Image.new("RGB", image_size, color="white")
+        img, crest_h = self._base_canvas(image_size, banner_height, banner_name, self.FEED_CREST_DIVISOR, 20)
         draw = ImageDraw.Draw(img)
 
-        banner = self._pick_banner(image_size, banner_height)
-        img.paste(banner, (0, 0), banner)
-        crest_h = self._place_crest(img, image_size, banner_height, crest_divisor=5, y_pos=20)
-
-        fonts = self._load_fonts({"header": 60, "date": 30, "section": 40, "body": 24})
+        fonts = self._load_fonts(self.FEED_FONT_SIZES)
         title_h = self._draw_header_box(img, draw, day, date_text, banner_height, fonts)
 
         start_y = max(crest_h + 20, title_h + 30)
-        self._draw_menu_block(draw, menu_dict, start_y, fonts, image_size[0])
-
-        footer = "Bon Appétit!"
-        footer_w, _ = self._text_size(draw, footer, fonts["body"])
-        draw.text(((image_size[0] - footer_w) / 2, image_size[1] - 50), footer, fill="black", font=fonts["body"])
-        return self._save(img)
-
-    def generate_story(self, day, date_text, menu_dict):
-        image_size = (1080, 1920)
+        footer_y = image_size[1] - 50
+        self._draw_menu_block(
+            draw, menu_dict, start_y, footer_y, self.FEED_FONT_SIZES, image_size[0],
+            auto_fit,
+        )
+
+        self._draw_footer(draw, image_size, footer_y, fonts["body"])
+        return self._save(img, key)
+
+    def generate_story(self, day, date_text, menu_dict, auto_fit=None):
+        auto_fit = self.auto_fit if auto_fit is None else auto_fit
+        key, banner_name = self._render_key("story", day, date_text, menu_dict, auto_fit)
+        cached = self._cached(key)
+        if cached:
+            return cached
+
+        image_size = self.STORY_SIZE
         banner_height = int(image_size[1] / 3)
-        img = Image.new("RGB", image_size, color="white")
+        img, _ = self._base_canvas(
+            image_size, banner_height, banner_name, self.STORY_CREST_DIVISOR, int(banner_height * 0.2)
+        )
         draw = ImageDraw.Draw(img)
 
-        banner = self._pick_banner(image_size, banner_height)
-        img.paste(banner, (0, 0), banner)
-        self._place_crest(img, image_size, banner_height, crest_divisor=6, y_pos=int(banner_height * 0.2))
-
-        fonts = self._load_fonts({"header": 70, "date": 30, "section": 50, "body": 35})
+        fonts = self._load_fonts(self.STORY_FONT_SIZES)
         self._draw_header_box(img, draw, day, date_text, banner_height, fonts, date_gap=10)
 
-        self._draw_menu_block(draw, menu_dict, banner_height, fonts, image_size[0])
-
-        footer = "Bon Appétit!"
-        footer_w, _ = self._text_size(draw, footer, fonts["body"])
-        draw.text(((image_size[0] - footer_w) / 2, image_size[1] - 100), footer, fill="black", font=fonts["body"])
-        return self._save(img)
+        footer_y = image_size[1] - 100
+        self._draw_menu_block(
+            draw, menu_dict, banner_height, footer_y, self.STORY_FONT_SIZES, image_size[0],
+            auto_fit,
+        )
+
+        self._draw_footer(draw, image_size, footer_y, fonts["body"])
+        return self._save(img, key)
+
+    def generate_week(self, menu_week, menu):
+        """Render the seven feed images for the week starting ``menu_week``.
+
+        Days render in this process unless ``week_workers`` > 1, in which case
+        misses go to a shared, long-lived process pool; either way they are
+        returned in Monday..Sunday order, exactly as calling
+        generate_image for each day in turn would.
+        """
+        results, jobs = [], []
+        for index, day in enumerate(WEEKDAYS):
+            day_date = menu_week + timedelta(days=index)
+            date_text = day_date.strftime("%d %B")
+            day_menu = menu.get(day, {})
+            key, banner_name = self._render_key("feed", day, date_text, day_menu, self.auto_fit)
+            results.append(self._cached(key))
+            if results[-1] is None:
+                jobs.append((index, (key, banner_name, day, date_text, day_menu, self.auto_fit)))
+
+        if self.week_workers > 1 and len(jobs) > 1:
+            try:
+                executor = _get_week_pool(self.week_workers, self)
+                futures = [executor.submit(_render_week_day, self, job) for _, job in jobs]
+                for (index, _), future in zip(jobs, futures):
+                    result, fit = future.result()
+                    if fit:
+                        self._record_fit(fit)
+                    if isinstance(result, RenderedImage):
+                        _memory_renders.put(result.key, result)
+                    results[index] = result
+                return results
+            except BrokenProcessPool as exc:
+                # Usually a worker killed for memory; start a fresh pool next time.
+                print(f"Render pool broke ({exc}); rendering the rest of the week sequentially")
+                shutdown_week_pool()
+            except (OSError, NotImplementedError, pickle.PicklingError) as exc:
+                print(f"Process pool unavailable ({exc}); rendering the rest of the week sequentially")
+
+        for index, job in jobs:
+            if results[index] is None:
+                results[index] = self._render_image(*job)
+        return results
 
     def _public_url(self, menu_name, file_path):
         if self.base_url:
@@ -164,9 +499,89 @@ class PostGenerator:
         return file_path
 
 
+def _peak_rss_for_first_image(reduced_banner_decode):
+    import resource
+
+    pg = PostGenerator(base_url="")
+    pg.reduced_banner_decode = reduced_banner_decode
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    path = pg.generate_image("Monday", "16 September", SAMPLE_MENU)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    os.remove(path)
+    return before, after
+
+
+def measure_render_memory():
+    """Report the peak RSS growth of one generate_image call per banner decode mode.
+
+    Each mode runs in a fresh interpreter so the process high-water mark
+    (ru_maxrss, in KiB on Linux) is not polluted by the other run.
+    """
+    context = multiprocessing.get_context("spawn")
+    for label, reduced in (("full decode (before)", False), ("reduced decode (after)", True)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            before, after = executor.submit(_peak_rss_for_first_image, reduced).result()
+        print(f"{label}: peak RSS {after / 1024:.1f} MiB (+{(after - before) / 1024:.1f} MiB during generate_image)")
+
+
+def bench_week(rounds=3):
+    """Time a week's renders and their base canvases, with and without cached templates.
+
+    Renders go through _render_image so the content-addressed cache is bypassed;
+    the canvas timing isolates the part template caching changes.
+    """
+    import time
+
+    for label, cache_templates in (("fresh canvas (before)", False), ("cached canvas (after)", True)):
+        pg = PostGenerator(base_url="", output="memory", week_workers=1)
+        pg.cache_templates = cache_templates
+        pg.warm_up()
+        render_timings, canvas_timings = [], []
+        for _ in range(rounds):
+            for index, day in enumerate(WEEKDAYS):
+                date_text = f"{14 + index} October"
+                key, banner_name = pg._render_key("feed", day, date_text, SAMPLE_MENU, pg.auto_fit)
+                started = time.perf_counter()
+                pg._base_canvas(pg.FEED_SIZE, int(pg.FEED_SIZE[1] / 4.3), banner_name, pg.FEED_CREST_DIVISOR, 20)
+                canvas_timings.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                pg._render_image(key, banner_name, day, date_text, SAMPLE_MENU, pg.auto_fit)
+                render_timings.append(time.perf_counter() - started)
+        render_timings.sort()
+        canvas_timings.sort()
+        print(
+            f"{label}: median {render_timings[len(render_timings) // 2] * 1000:.1f} ms per image, "
+            f"of which base canvas {canvas_timings[len(canvas_timings) // 2] * 1000:.2f} ms "
+            f"over {len(render_timings)} renders"
+        )
+
+
+SAMPLE_MENU = {
+    "Lunch": ["beans", "bread"],
+    "Dinner": ["Something tasty"],
+}
+
+
 if __name__ == "__main__":
-    pg = PostGenerator()
-    pg.generate_story("Monday", "16th September", {
-        "Lunch": ["beans", "bread"],
-        "Dinner": ["Something tasty"]
-    })
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render a sample post")
+    parser.add_argument(
+        "--measure-memory",
+        action="store_true",
+        help="Report peak memory per generate_image call with full vs reduced banner decoding",
+    )
+    parser.add_argument(
+        "--bench-week",
+        action="store_true",
+        help="Time weekly carousel renders and base canvases with and without cached templates",
+    )
+    args = parser.parse_args()
+
+    if args.measure_memory:
+        measure_render_memory()
+    elif args.bench_week:
+        bench_week()
+    else:
+        pg = PostGenerator()
+        pg.generate_story("Monday", "16th September", SAMPLE_MENU)
\ No newline at end of file
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+import requests
+
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+HEADERS_FILE = os.path.join(CURRENT_DIR, "queens_headers.txt")
+FETCH_STATE_FILE = os.path.join(CURRENT_DIR, "menu_fetch_state.json")
+
+HTTP_TIER = "http"
+BROWSER_TIER = "browser"
+
+# Statuses bot protection answers with instead of the page.
+BLOCKED_STATUSES = {403, 429, 503}
+MENU_MARKER = "accordion-wrapper"
+# Text that identifies a bot challenge served with a 200 instead of the page.
+CHALLENGE_MARKERS = ("captcha", "cf-challenge", "challenge-platform", "cf_chl_opt")
+
+
+def _brotli_available():
+    try:
+        import brotli  # noqa: F401
+    except ModuleNotFoundError:
+        return False
+    return True
+
+
+def load_headers(path=HEADERS_FILE):
+    """Read ``Name: value`` lines, leaving Host and encodings we can't decode to requests."""
+    headers = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, sep, value = line.partition(":")
+                if sep and name.strip():
+                    headers[name.strip()] = value.strip()
+    except FileNotFoundError:
+        return headers
+
+    headers.pop("Host", None)
+    if "Accept-Encoding" in headers and not _brotli_available():
+        encodings = [e.strip() for e in headers["Accept-Encoding"].split(",")]
+        headers["Accept-Encoding"] = ", ".join(e for e in encodings if e and e != "br")
+    return headers
+
+
+def menu_fingerprint(html):
+    """Hash just the week heading and menu accordion, ignoring the rest of the page.
+
+    Found by string search so an unchanged page is recognised without
+    parsing it; returns None if neither fragment is present.
+    """
+    fragments = []
+    for marker, end in (("sectionheader-content", "</h2>"), (MENU_MARKER, "</dl>")):
+        start = html.find(marker)
+        if start == -1:
+            continue
+        stop = html.find(end, start)
+        fragments.append(html[start:] if stop == -1 else html[start:stop + len(end)])
+    if not fragments:
+        return None
+    return hashlib.sha256("\n".join(fragments).encode("utf-8")).hexdigest()
+
+
+class FetchState:
+    """Validators and fingerprint from the last successful cycle, per URL."""
+
+    def __init__(self, path=FETCH_STATE_FILE):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def get(self, url):
+        return self.entries.get(url, {})
+
+    def update(self, url, result, fingerprint):
+        self.entries[url] = {
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "fingerprint": fingerprint,
+        }
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+class FetchResult:
+    def __init__(self, html, tier, url, status=None, elapsed=0.0, etag=None, last_modified=None):
+        self.html = html
+        self.tier = tier
+        self.url = url
+        self.status = status
+        self.elapsed = elapsed
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+class MenuFetcher:
+    """Fetch the menu page with a plain GET, falling back to Playwright.
+
+    The browser tier only runs when the HTTP response is a captcha redirect,
+    a blocking status or a recognisable challenge page. Hosts that needed
+    the browser go straight to it next time, but every ``reprobe_every`` fetches the HTTP tier is tried again in case
+    the protection has lifted. Keep one fetcher for the life of a daemon so
+    that memory (and ``stats``) carries across cycles.
+    """
+
+    def __init__(self, headers=None, timeout=10, browser_pool=None, headless=True, reprobe_every=10):
+        self.session = requests.Session()
+        self.session.headers.update(load_headers() if headers is None else headers)
+        self.timeout = timeout
+        self.browser_pool = browser_pool
+        self.headless = headless
+        self.reprobe_every = reprobe_every
+        self.preferred = {}
+        self._browser_runs = {}
+        self.stats = {"http": 0, "browser": 0, "http_blocked": 0, "http_errors": 0, "reprobes": 0}
+
+    def _looks_blocked(self, response):
+        # A page without the menu is still the real page (e.g. a week with
+        # nothing posted yet); only a challenge is worth a browser.
+        if "captcha" in response.url.lower() or response.status_code in BLOCKED_STATUSES:
+            return True
+        if MENU_MARKER in response.text:
+            return False
+        text = response.text.lower()
+        return any(marker in text for marker in CHALLENGE_MARKERS)
+
+    def _fetch_http(self, url, validators=None):
+        headers = {}
+        if validators and validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators and validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as exc:
+            print(f"HTTP fetch failed: {exc}")
+            self.stats["http_errors"] += 1
+            return None
+
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if response.status_code == 304 and headers:
+            return FetchResult(None, HTTP_TIER, response.url, 304, etag=etag, last_modified=last_modified)
+        if self._looks_blocked(response):
+            print(f"HTTP fetch blocked (status={response.status_code}, url={response.url})")
+            self.stats["http_blocked"] += 1
+            return None
+        if response.status_code != 200:
+            # A plain server error; a browser would get the same answer.
+            print(f"HTTP fetch failed with status {response.status_code}")
+            self.stats["http_errors"] += 1
+            return FetchResult(None, HTTP_TIER, response.url, response.status_code)
+        return FetchResult(response.text, HTTP_TIER, response.url, response.status_code, etag=etag, last_modified=last_modified)
+
+    def _fetch_browser(self, url):
+        from .get_menu_playwright import MenuScraper
+
+        scraper = MenuScraper(
+            url,
+            headless=self.headless,
+            timeout_ms=int(self.timeout * 1000),
+            browser_pool=self.browser_pool,
+        )
+        if scraper.html is None:
+            return None
+        return FetchResult(scraper.html, BROWSER_TIER, url)
+
+    def _should_try_http(self, host):
+        if self.preferred.get(host, HTTP_TIER) == HTTP_TIER:
+            return True
+        runs = self._browser_runs.get(host, 0)
+        if runs and runs % self.reprobe_every == 0:
+            self.stats["reprobes"] += 1
+            return True
+        return False
+
+    def fetch(self, url, validators=None):
+        """Return a FetchResult for ``url``; its ``html`` is None if every tier failed.
+
+        ``validators`` (a FetchState entry) makes the HTTP tier conditional;
+        an unchanged page comes back with ``not_modified`` and no html.
+        """
+        host = urlparse(url).hostname or ""
+        started = time.perf_counter()
+
+        result = None
+        if self._should_try_http(host):
+            result = self._fetch_http(url, validators)
+            if result is not None and result.html is None and not result.not_modified:
+                # The server answered with an error; final, but not a success.
+                result.elapsed = time.perf_counter() - started
+                return result
+            if result is not None:
+                self.stats["http"] += 1
+                if self.preferred.get(host) == BROWSER_TIER:
+                    print(f"HTTP tier works again for {host}")
+                self.preferred[host] = HTTP_TIER
+                self._browser_runs[host] = 0
+
+        if result is None:
+            result = self._fetch_browser(url)
+            if result is not None:
+                self.stats["browser"] += 1
+                self.preferred[host] = BROWSER_TIER
+                self._browser_runs[host] = self._browser_runs.get(host, 0) + 1
+
+        if result is None:
+            return FetchResult(None, None, url, elapsed=time.perf_counter() - started)
+        result.elapsed = time.perf_counter() - started
+        status = " (not modified)" if result.not_modified else ""
+        print(f"Fetched {url} via {result.tier}{status} in {result.elapsed:.2f}s ({self.stats})")
+        return result
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,129 @@
+import json
+import os
+import time
+import tracemalloc
+from functools import lru_cache
+
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(CURRENT_DIR, "fixtures")
+DEFAULT_MENU_URL = "https://www.queens.cam.ac.uk/life-at-queens/catering/cafeteria/cafeteria-menu"
+
+# Fixture "parser" values: the accordion page scraped by get_menu_playwright
+# and the old table page scraped by get_menu.
+PARSERS = ("playwright", "legacy")
+
+
+@lru_cache(maxsize=None)
+def _scraper_class(parser, restricted):
+    if parser == "legacy":
+        from .get_menu import MenuScraper
+    else:
+        from .get_menu_playwright import MenuScraper
+    if MenuScraper.restricted_parse == restricted:
+        return MenuScraper
+    return type(MenuScraper.__name__, (MenuScraper,), {"restricted_parse": restricted})
+
+
+def _scrape(parser, html, restricted):
+    scraper = _scraper_class(parser, restricted)("about:blank", html=html)
+    week = scraper.get_queens_week()
+    return scraper.get_queens_menu(), week.strftime("%m-%d") if week else None
+
+
+def _paths(name, fixtures_dir):
+    return os.path.join(fixtures_dir, f"{name}.html"), os.path.join(fixtures_dir, f"{name}.json")
+
+
+def capture(name, parser="playwright", url=DEFAULT_MENU_URL, html_file=None, fixtures_dir=FIXTURES_DIR):
+    """Save a page snapshot and what today's parser makes of it.
+
+    The expected json is written from the current parser's output, so check
+    it by hand before committing the fixture.
+    """
+    if html_file:
+        with open(html_file, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        from .menu_fetcher import MenuFetcher
+
+        result = MenuFetcher().fetch(url)
+        if result.html is None:
+            raise RuntimeError(f"Could not fetch {url}")
+        html = result.html
+
+    menu, week = _scrape(parser, html, restricted=False)
+    os.makedirs(fixtures_dir, exist_ok=True)
+    html_path, expected_path = _paths(name, fixtures_dir)
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    with open(expected_path, "w", encoding="utf-8") as f:
+        json.dump({"parser": parser, "week": week, "menu": menu}, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Captured {name}: week={week}, days={len(menu)} -> {expected_path}")
+
+
+def _measure(parser, html, restricted, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = _scrape(parser, html, restricted)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    _scrape(parser, html, restricted)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, sorted(timings)[len(timings) // 2], peak
+
+
+def run(fixtures_dir=FIXTURES_DIR, rounds=5):
+    """Check every fixture with full and restricted parsing; return the number of failures."""
+    names = sorted(name[:-5] for name in os.listdir(fixtures_dir) if name.endswith(".json"))
+    failures = 0
+    for name in names:
+        html_path, expected_path = _paths(name, fixtures_dir)
+        with open(expected_path, encoding="utf-8") as f:
+            expected = json.load(f)
+        with open(html_path, encoding="utf-8") as f:
+            html = f.read()
+
+        parser = expected.get("parser", "playwright")
+        for restricted in (False, True):
+            (menu, week), seconds, peak = _measure(parser, html, restricted, rounds)
+            ok = menu == expected["menu"] and week == expected["week"]
+            failures += not ok
+            mode = "restricted" if restricted else "full"
+            print(
+                f"{'ok  ' if ok else 'FAIL'} {name} [{parser}, {mode}]: "
+                f"{seconds * 1000:.2f} ms, peak {peak / 1024:.0f} KiB"
+            )
+            if not ok:
+                print(f"     expected week={expected['week']} menu={expected['menu']}")
+                print(f"     got      week={week} menu={menu}")
+    print(f"{len(names)} fixtures, {failures} failures")
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Capture menu page fixtures and check the scrapers against them offline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = subparsers.add_parser("capture", help="Snapshot a page into the fixtures directory")
+    capture_parser.add_argument("name")
+    capture_parser.add_argument("--parser", choices=PARSERS, default="playwright")
+    capture_parser.add_argument("--url", default=DEFAULT_MENU_URL)
+    capture_parser.add_argument("--html-file", default=None, help="Use a saved page instead of fetching")
+
+    run_parser = subparsers.add_parser("run", help="Parse every fixture and compare with its expected output")
+    run_parser.add_argument("--rounds", type=int, default=5)
+
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        capture(args.name, args.parser, args.url, args.html_file, args.fixtures_dir)
+    else:
+        raise SystemExit(1 if run(args.fixtures_dir, args.rounds) else 0)
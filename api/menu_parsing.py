@@ -0,0 +1,89 @@
+import os
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+def _lxml_available():
+    try:
+        import lxml  # noqa: F401
+    except ModuleNotFoundError:
+        return False
+    return True
+
+
+# MENU_HTML_PARSER overrides the backend, e.g. to compare against html.parser.
+PARSER = os.getenv("MENU_HTML_PARSER") or ("lxml" if _lxml_available() else "html.parser")
+
+
+def _has_class(attrs, name):
+    # While parsing, attrs hold the raw attribute strings; class isn't split yet.
+    classes = attrs.get("class") or ""
+    if isinstance(classes, str):
+        classes = classes.split()
+    return name in classes
+
+
+def _is_menu_region(name, attrs):
+    if name == "h2":
+        return True
+    if name == "dl":
+        return _has_class(attrs, "accordion-wrapper")
+    if name == "div":
+        return _has_class(attrs, "sectionheader-content")
+    return False
+
+
+def _is_legacy_content(name, attrs):
+    return name == "div" and _has_class(attrs, "content")
+
+
+# Keep only what get_menu_playwright.MenuScraper reads: the menu accordion,
+# the week header and any bare h2 its fallback may use.
+MENU_STRAINER = SoupStrainer(_is_menu_region)
+# get_menu.MenuScraper only looks inside div.content.
+LEGACY_STRAINER = SoupStrainer(_is_legacy_content)
+
+
+def parse_html(html, strainer=None, parser=None):
+    """Build a soup of ``html``, only keeping subtrees ``strainer`` matches."""
+    return BeautifulSoup(html, parser or PARSER, parse_only=strainer)
+
+
+def _time_parse(html, strainer, parser, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        soup = parse_html(html, strainer, parser)
+        timings.append(time.perf_counter() - started)
+    return soup, sorted(timings)[len(timings) // 2]
+
+
+def bench_parse(html, rounds=20):
+    """Median parse time of a full vs restricted tree, per available backend."""
+    from .get_menu_playwright import MenuScraper
+
+    parsers = ["html.parser"] + (["lxml"] if _lxml_available() else [])
+    baseline = None
+    for parser in parsers:
+        for label, strainer in (("full", None), ("restricted", MENU_STRAINER)):
+            soup, seconds = _time_parse(html, strainer, parser, rounds)
+            scraper = MenuScraper("about:blank", html=html)
+            scraper._soup = soup
+            result = (scraper.get_queens_menu(), scraper.get_queens_week())
+            if baseline is None:
+                baseline = result
+            same = "same" if result == baseline else "DIFFERENT"
+            print(f"{parser:>11} {label:>10}: {seconds * 1000:7.2f} ms  ({same} menu and week)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark menu page parsing against saved HTML.")
+    parser.add_argument("html_file", help="Saved copy of the menu page")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.html_file, encoding="utf-8") as f:
+        bench_parse(f.read(), rounds=args.rounds)
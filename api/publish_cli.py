@@ -1,24 +1,29 @@
 import argparse
-import mimetypes
 import os
+import random
+import threading
 import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from contextlib import suppress
 from datetime import datetime, timedelta
 from json import load, dump
 from uuid import uuid4
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .get_emoji import annotate_menu
 
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 USERS_FILE = os.path.join(CURRENT_DIR, "users.json")
 CUSTOM_DETAILS_FILE = os.path.join(CURRENT_DIR, "custom_details.json")
 POST_HISTORY_FILE = os.path.join(CURRENT_DIR, "posts_made.json")
+LAST_MENU_FILE = os.path.join(CURRENT_DIR, "last_menu.json")
 EPOCH_ISO = "1970-01-01T00:00:00"
 DEFAULT_MENU_URL = "https://www.queens.cam.ac.uk/life-at-queens/catering/cafeteria/cafeteria-menu"
-WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-VERIFY_RETRIES = 5
-VERIFY_RETRY_SECONDS = 1
+VERIFY_BACKOFF_SECONDS = 0.25
+VERIFY_BACKOFF_MAX_SECONDS = 4
 
 
 def _load_json(path, default):
@@ -114,37 +119,135 @@ def _format_week_caption(menu_week):
     return f"Week Commencing {menu_week.strftime('%d/%m/%y')}"
 
 
-def _upload_temp_image(r2, local_path, run_id):
-    ext = os.path.splitext(local_path)[1].lower() or ".jpg"
-    object_key = f"tmp/{run_id}/{uuid4().hex}{ext}"
-    content_type = mimetypes.guess_type(local_path)[0] or "image/jpeg"
-    public_url = r2.upload_file(local_path, object_key, content_type=content_type)
-    _verify_uploaded_image(public_url)
-    print(f"Uploaded image: {public_url}")
+def _temp_image_key(run_id, image):
+    return f"tmp/{run_id}/{uuid4().hex}{image.extension}"
+
+
+def _upload_temp_image(r2, image, run_id, object_key=None, stop=None):
+    object_key = object_key or _temp_image_key(run_id, image)
+    public_url = r2.upload_bytes(image.data, object_key, content_type=image.content_type)
+    visible_after = _verify_uploaded_image(public_url, stop)
+    print(f"Uploaded image: {public_url} (visible after {visible_after:.2f}s)")
     return public_url, object_key
 
 
-def _verify_uploaded_image(public_url):
-    last_error = None
-    for _ in range(VERIFY_RETRIES):
+def _upload_temp_images(r2, images, run_id):
+    """Upload and verify ``images`` concurrently, returning (urls, keys) in input order.
+
+    The first failure stops images that haven't started and cuts short the
+    verify retries of those in flight; everything uploaded is then deleted
+    and one error naming every failed image is raised.
+    """
+    keys = [_temp_image_key(run_id, image) for image in images]
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=max(1, min(_upload_workers(), len(images)))) as pool:
+        futures = [
+            pool.submit(_upload_temp_image, r2, image, run_id, key, stop)
+            for image, key in zip(images, keys)
+        ]
+        _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        if pending:
+            stop.set()
+            for future in pending:
+                future.cancel()
+
+    failures = [
+        f"image {index + 1}: {future.exception()}"
+        for index, future in enumerate(futures)
+        if not future.cancelled() and future.exception() is not None
+    ]
+    if failures:
+        with suppress(Exception):
+            r2.delete_keys(keys)
+        raise RuntimeError(f"{len(failures)} of {len(images)} uploads failed ({'; '.join(failures)})")
+    return [future.result()[0] for future in futures], keys
+
+
+_verify_session = None
+_verify_session_lock = threading.Lock()
+
+
+def _get_verify_session():
+    global _verify_session
+    with _verify_session_lock:
+        if _verify_session is None:
+            _verify_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_upload_workers())
+            _verify_session.mount("https://", adapter)
+            _verify_session.mount("http://", adapter)
+        return _verify_session
+
+
+def _probe_uploaded_image(session, public_url, timeout, mode="head"):
+    if mode == "get":
+        return session.get(public_url, timeout=timeout)
+    if mode == "head":
+        response = session.head(public_url, timeout=timeout, allow_redirects=True)
+        if response.status_code not in (405, 501):
+            return response
+    # Servers that refuse HEAD still honour a Range request for the first byte.
+    response = session.get(public_url, headers={"Range": "bytes=0-0"}, timeout=timeout, stream=True)
+    response.close()
+    return response
+
+
+def _verify_uploaded_image(public_url, stop=None):
+    """Wait until ``public_url`` serves an image; returns seconds until it did.
+
+    Probes back off exponentially with full jitter and give up once
+    VERIFY_DEADLINE_SECONDS (default 20) have passed since the first probe.
+    """
+    session = _get_verify_session()
+    mode = _verify_mode()
+    started = time.monotonic()
+    deadline = started + _verify_deadline_seconds()
+    backoff, attempts, last_error = VERIFY_BACKOFF_SECONDS, 0, None
+    while True:
+        if stop is not None and stop.is_set():
+            raise RuntimeError(f"Verification of {public_url} abandoned after another upload failed")
+        attempts += 1
         try:
-            response = requests.get(public_url, timeout=15)
+            response = _probe_uploaded_image(
+                session, public_url, max(1.0, min(15.0, deadline - time.monotonic())), mode
+            )
             if response.status_code >= 400:
                 last_error = f"HTTP {response.status_code}"
             else:
                 content_type = (response.headers.get("Content-Type") or "").lower()
                 if "image/" in content_type:
-                    return
+                    return time.monotonic() - started
                 last_error = f"unexpected content-type: {content_type or '<missing>'}"
         except requests.RequestException as exc:
             last_error = str(exc)
 
-        time.sleep(VERIFY_RETRY_SECONDS)
+        delay = random.uniform(0, backoff)
+        if time.monotonic() + delay >= deadline:
+            break
+        if stop is not None:
+            stop.wait(delay)
+        else:
+            time.sleep(delay)
+        backoff = min(backoff * 2, VERIFY_BACKOFF_MAX_SECONDS)
+
+    raise RuntimeError(
+        f"Uploaded image is not publicly reachable: {public_url} ({last_error}, {attempts} probes)"
+    )
 
-    raise RuntimeError(f"Uploaded image is not publicly reachable: {public_url} ({last_error})")
 
+def _upload_web_images(r2, encoder, menu_week, menu):
+    """Render the week with ``encoder`` (e.g. WEBP) for web consumers; returns {day: url}."""
+    from .make_post import WEEKDAYS, PostGenerator
+
+    pg = PostGenerator(base_url="", output="memory", encoder=encoder, emoji=True)
+    week_start = menu_week.date().isoformat()
+    urls = {}
+    for day, image in zip(WEEKDAYS, pg.generate_week(menu_week, menu)):
+        key = f"api/menu/week-{week_start}/{day.lower()}{image.extension}"
+        urls[day] = r2.upload_bytes(image.data, key, content_type=image.content_type)
+    return urls
 
-def _upload_menu_json(r2, menu_week, menu):
+
+def _upload_menu_json(r2, menu_week, menu, images=None):
     generated_at = datetime.utcnow().isoformat() + "Z"
     week_start = menu_week.date().isoformat()
     payload = {
@@ -152,13 +255,29 @@ def _upload_menu_json(r2, menu_week, menu):
         "week_commencing": week_start,
         "source": DEFAULT_MENU_URL,
         "menu": menu,
+        "emoji": annotate_menu(menu),
     }
+    if images:
+        payload["images"] = images
 
     latest_url = r2.upload_json(payload, f"api/menu/latest.json")
     week_url = r2.upload_json(payload, f"api/menu/week-{week_start}.json")
     return latest_url, week_url
 
 
+def _verify_mode():
+    # How uploads are checked: "head", a 1-byte "range" GET, or a full "get".
+    return os.getenv("VERIFY_MODE", "head").strip().lower()
+
+
+def _verify_deadline_seconds():
+    return float(os.getenv("VERIFY_DEADLINE_SECONDS", "20"))
+
+
+def _upload_workers():
+    return max(1, int(os.getenv("UPLOAD_WORKERS", "7")))
+
+
 def _cleanup_enabled():
     return os.getenv("CLOUDFLARE_DELETE_TEMP_AFTER_POST", "false").strip().lower() in {"1", "true", "yes"}
 
@@ -173,13 +292,7 @@ def _cleanup_temp_images(r2, keys):
 
 def _post_weekly_via_cloudflare(api, pg, r2, menu_week, menu):
     run_id = _new_run_id()
-    temp_keys, media_urls = [], []
-    for index, day in enumerate(WEEKDAYS):
-        day_date = menu_week + timedelta(days=index)
-        local_path = pg.generate_image(day, day_date.strftime("%d %B"), menu.get(day, {}))
-        public_url, object_key = _upload_temp_image(r2, local_path, run_id)
-        media_urls.append(public_url)
-        temp_keys.append(object_key)
+    media_urls, temp_keys = _upload_temp_images(r2, pg.generate_week(menu_week, menu), run_id)
 
     result = api.post_carousel(media_urls, _format_week_caption(menu_week))
     _cleanup_temp_images(r2, temp_keys)
@@ -190,8 +303,8 @@ def _post_daily_via_cloudflare(api, pg, r2, menu):
     run_id = _new_run_id()
     temp_keys = []
     day = datetime.today().strftime("%A")
-    local_path = pg.generate_story(day, datetime.now().strftime("%d %B"), menu.get(day, {}))
-    public_url, object_key = _upload_temp_image(r2, local_path, run_id)
+    image = pg.generate_story(day, datetime.now().strftime("%d %B"), menu.get(day, {}))
+    public_url, object_key = _upload_temp_image(r2, image, run_id)
     temp_keys.append(object_key)
 
     media_object_id = api.create_instagram_media_object(public_url, "Today's Menu", is_story=True)
@@ -200,12 +313,14 @@ def _post_daily_via_cloudflare(api, pg, r2, menu):
     return result
 
 
-def _run_once(mode):
+def _run_once(mode, fetcher=None):
     try:
         from .cloudflare_r2 import CloudflareR2Client
         from .get_menu_playwright import MenuScraper
+        from .image_encoder import ImageEncoder
         from .insta import InstagramAPI
         from .make_post import PostGenerator
+        from .menu_fetcher import FetchState, MenuFetcher, menu_fingerprint
     except ModuleNotFoundError as exc:
         print(f"Missing dependency: {exc}. Install required packages before running publish cycles.")
         return 1
@@ -225,23 +340,48 @@ def _run_once(mode):
 
     api = InstagramAPI(user_id=user_id, access_token=access_token)
     r2 = CloudflareR2Client()
-    menu_scraper = MenuScraper(DEFAULT_MENU_URL, headless=True)
-
-    menu_week = menu_scraper.get_queens_week()
-    if menu_week is None:
-        print("Failed to fetch menu week")
+    fetcher = fetcher or MenuFetcher()
+    fetch_state = FetchState()
+    previous = fetch_state.get(DEFAULT_MENU_URL)
+    last_menu = _load_json(LAST_MENU_FILE, None)
+
+    # Conditional headers only make sense while we still hold the menu they vouch for.
+    result = fetcher.fetch(DEFAULT_MENU_URL, previous if last_menu else None)
+    fingerprint = menu_fingerprint(result.html) if result.html is not None else None
+
+    short_circuit = None
+    if last_menu and result.not_modified:
+        short_circuit = "HTTP 304 Not Modified"
+    elif last_menu and fingerprint and fingerprint == previous.get("fingerprint"):
+        short_circuit = "menu fingerprint unchanged"
+
+    if short_circuit:
+        print(f"Menu page unchanged ({short_circuit}); skipping parse and menu JSON upload")
+        menu_week = datetime.fromisoformat(last_menu["menu_week"])
+        menu = last_menu["menu"]
+    elif result.html is None:
+        print("Failed to fetch menu page")
         return 1
+    else:
+        menu_scraper = MenuScraper(DEFAULT_MENU_URL, html=result.html)
 
-    menu = menu_scraper.get_queens_menu()
-    if not menu:
-        print("Failed to fetch menu")
-        return 1
+        menu_week = menu_scraper.get_queens_week()
+        if menu_week is None:
+            print("Failed to fetch menu week")
+            return 1
+
+        menu = menu_scraper.get_queens_menu()
+        if not menu:
+            print("Failed to fetch menu")
+            return 1
 
-    latest_menu_url, week_menu_url = _upload_menu_json(r2, menu_week, menu)
-    print(f"Published menu JSON: latest={latest_menu_url}")
-    print(f"Published menu JSON: weekly={week_menu_url}")
+        web_encoder = ImageEncoder.web_from_env()
+        web_images = _upload_web_images(r2, web_encoder, menu_week, menu) if web_encoder else None
+        latest_menu_url, week_menu_url = _upload_menu_json(r2, menu_week, menu, web_images)
+        print(f"Published menu JSON: latest={latest_menu_url}")
+        print(f"Published menu JSON: weekly={week_menu_url}")
 
-    pg = PostGenerator(base_url="")
+    pg = PostGenerator(base_url="", output="memory", emoji=True)
 
     posted_weekly, posted_daily = False, False
     today_floor = _today_floor_iso()
@@ -294,10 +434,36 @@ def _run_once(mode):
 
     _save_json(CUSTOM_DETAILS_FILE, custom_data)
     _save_json(POST_HISTORY_FILE, post_history)
+    if not short_circuit:
+        # Only a fully successful cycle may vouch for the page next time.
+        _save_json(LAST_MENU_FILE, {"menu_week": menu_week.isoformat(), "menu": menu})
+        fetch_state.update(DEFAULT_MENU_URL, result, fingerprint)
+        fetch_state.save()
     print(f"Done. posted_weekly={posted_weekly}, posted_daily={posted_daily}, mode={mode}")
+    print(f"Graph API calls so far: {api.session.latency_summary()}")
     return 0
 
 
+def _new_fetcher(max_uses):
+    """Build the fetcher (and the Chromium pool behind its browser tier) shared by every cycle."""
+    try:
+        from .browser_pool import BrowserPool
+        from .menu_fetcher import MenuFetcher
+    except ModuleNotFoundError as exc:
+        print(f"Missing dependency: {exc}. Each cycle will report it until installed.")
+        return None, None
+    browser_pool = BrowserPool(headless=True, max_uses=max_uses)
+    return browser_pool, MenuFetcher(browser_pool=browser_pool)
+
+
+def _warm_render_assets():
+    try:
+        from .make_post import PostGenerator
+    except ModuleNotFoundError:
+        return
+    PostGenerator(base_url="", output="memory", emoji=True).warm_up()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Queens Menu Bot CLI publisher via Cloudflare R2")
     parser.add_argument(
@@ -317,6 +483,12 @@ def main():
         default=15,
         help="Polling interval in minutes for continuous mode",
     )
+    parser.add_argument(
+        "--browser-max-uses",
+        type=int,
+        default=50,
+        help="Relaunch the shared Chromium after this many page loads in continuous mode",
+    )
     args = parser.parse_args()
 
     if args.interval_minutes < 1:
@@ -326,11 +498,19 @@ def main():
         raise SystemExit(_run_once(args.mode))
 
     print(f"Starting continuous publisher: mode={args.mode}, every {args.interval_minutes} minutes")
-    while True:
-        code = _run_once(args.mode)
-        if code != 0:
-            print("Cycle failed; retrying next interval")
-        time.sleep(args.interval_minutes * 60)
+    _warm_render_assets()
+    browser_pool, fetcher = _new_fetcher(args.browser_max_uses)
+    try:
+        while True:
+            code = _run_once(args.mode, fetcher)
+            if code != 0:
+                print("Cycle failed; retrying next interval")
+            time.sleep(args.interval_minutes * 60)
+    finally:
+        if fetcher is not None:
+            fetcher.close()
+        if browser_pool is not None:
+            browser_pool.close()
 
 
 if __name__ == "__main__":
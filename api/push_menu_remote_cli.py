@@ -60,12 +60,14 @@ def _pick_user(users_data, requested_user_id=None, override_token=None):
     return _get_first_unexpired_user(users_data)
 
 
-def _collect_menu():
+def _collect_menu(fetcher=None):
     from .get_menu_playwright import MenuScraper
+    from .menu_fetcher import MenuFetcher
 
     menu_scraper = MenuScraper(
         "https://www.queens.cam.ac.uk/life-at-queens/catering/cafeteria/cafeteria-menu",
         headless=True,
+        fetcher=fetcher or MenuFetcher(),
     )
     menu_week = menu_scraper.get_queens_week()
     menu = menu_scraper.get_queens_menu()
@@ -90,7 +92,7 @@ def _send_update(remote_url, user_id, access_token, menu_week, menu, mode):
     return response.status_code, response.text
 
 
-def _run_once(args):
+def _run_once(args, fetcher=None):
     users_data = _load_json(args.users_file, {})
     user_id, access_token, expires_at = _pick_user(users_data, args.user_id, args.access_token)
 
@@ -104,7 +106,7 @@ def _run_once(args):
         print(f"Using user_id={user_id}")
 
     try:
-        menu_week, menu = _collect_menu()
+        menu_week, menu = _collect_menu(fetcher)
     except Exception as exc:
         print(f"Menu scrape failed: {exc}")
         return 1
@@ -138,6 +140,12 @@ def main():
     parser.add_argument("--users-file", default=USERS_FILE)
     parser.add_argument("--user-id", default=None)
     parser.add_argument("--access-token", default=None)
+    parser.add_argument(
+        "--browser-max-uses",
+        type=int,
+        default=50,
+        help="Relaunch the shared Chromium after this many page loads in continuous mode",
+    )
 
     args = parser.parse_args()
 
@@ -151,11 +159,16 @@ def main():
         f"Starting remote updater: mode={args.mode}, every {args.interval_minutes} minutes, "
         f"remote={args.remote_url}"
     )
-    while True:
-        code = _run_once(args)
-        if code != 0:
-            print("Cycle failed; retrying next interval")
-        time.sleep(args.interval_minutes * 60)
+    from .browser_pool import BrowserPool
+    from .menu_fetcher import MenuFetcher
+
+    with BrowserPool(headless=True, max_uses=args.browser_max_uses) as browser_pool:
+        fetcher = MenuFetcher(browser_pool=browser_pool)
+        while True:
+            code = _run_once(args, fetcher)
+            if code != 0:
+                print("Cycle failed; retrying next interval")
+            time.sleep(args.interval_minutes * 60)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+BANNER_CACHE_SIZE = int(os.getenv("BANNER_CACHE_SIZE", "16"))
+
+_banner_lock = threading.Lock()
+_banner_cache = OrderedDict()
+_banner_stats = {"hits": 0, "misses": 0}
+
+
+def _decode_banner_strip(path, width, banner_height, reduced=True):
+    with Image.open(path) as banner:
+        if reduced and banner.format == "JPEG":
+            # Let libjpeg do the bulk of the downscale (1/2, 1/4, 1/8) while
+            # decoding; draft never goes below the requested size.
+            banner.draft("RGB", (width, math.ceil(width * banner.height / banner.width)))
+        has_alpha = banner.mode in ("RGBA", "LA") or "transparency" in banner.info
+        if not reduced or has_alpha:
+            banner = banner.convert("RGBA")
+        elif banner.mode != "RGB":
+            banner = banner.convert("RGB")
+        banner = banner.resize((width, int(width * banner.height / banner.width)))
+    top = (banner.height - banner_height) // 2
+    return banner.crop((0, top, width, top + banner_height))
+
+
+def get_banner_strip(path, width, banner_height, reduced=True):
+    """Return the resized, centre-cropped banner strip for ``path``.
+
+    Strips are shared by every PostGenerator in the process and kept in a
+    bounded LRU keyed by (file, mtime, width, banner height), so a banner is
+    only decoded and resampled the first time it is used at a given size.
+    With ``reduced`` JPEGs are decoded at the smallest DCT scale covering
+    ``width`` and opaque banners stay RGB; paste RGBA strips with a mask.
+    """
+    key = (path, os.path.getmtime(path), width, banner_height, reduced)
+    with _banner_lock:
+        strip = _banner_cache.get(key)
+        if strip is not None:
+            _banner_cache.move_to_end(key)
+            _banner_stats["hits"] += 1
+            return strip
+        _banner_stats["misses"] += 1
+
+    strip = _decode_banner_strip(path, width, banner_height, reduced)
+
+    with _banner_lock:
+        _banner_cache[key] = strip
+        _banner_cache.move_to_end(key)
+        while len(_banner_cache) > BANNER_CACHE_SIZE:
+            _banner_cache.popitem(last=False)
+    return strip
+
+
+def banner_cache_stats():
+    with _banner_lock:
+        return {**_banner_stats, "size": len(_banner_cache), "max_size": BANNER_CACHE_SIZE}
+
+
+def clear_banner_cache():
+    with _banner_lock:
+        _banner_cache.clear()
+        _banner_stats["hits"] = 0
+        _banner_stats["misses"] = 0
+
+
+_asset_lock = threading.Lock()
+_fonts = {}
+_crests = {}
+
+
+def get_font(path, size):
+    """Return a FreeTypeFont for (path, size), parsed once per process."""
+    key = (path, size)
+    font = _fonts.get(key)
+    if font is None:
+        with _asset_lock:
+            font = _fonts.get(key)
+            if font is None:
+                font = ImageFont.truetype(path, size)
+                _fonts[key] = font
+    return font
+
+
+def get_crest(path, max_width, max_height):
+    """Return the crest scaled to fit within (max_width, max_height).
+
+    Scaled variants are cached per (file, mtime, bounds) so the full-size
+    PNG is only decoded once for each layout that uses it.
+    """
+    key = (path, os.path.getmtime(path), max_width, max_height)
+    crest = _crests.get(key)
+    if crest is None:
+        with _asset_lock:
+            crest = _crests.get(key)
+            if crest is None:
+                with Image.open(path) as source:
+                    scale = min(max_width / source.width, max_height / source.height)
+                    crest = source.resize((int(source.width * scale), int(source.height * scale)))
+                _crests[key] = crest
+    return crest
+
+
+def warm_assets(font_path, font_sizes=(), crest_path=None, crest_bounds=()):
+    """Load fonts and scaled crests up front so the first render doesn't pay for it."""
+    for size in font_sizes:
+        get_font(font_path, size)
+    if crest_path:
+        for max_width, max_height in crest_bounds:
+            get_crest(crest_path, max_width, max_height)
+
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "8"))
+
+_template_lock = threading.Lock()
+_templates = OrderedDict()
+
+
+def get_template_canvas(key, build):
+    """Return the cached ``build()`` result for ``key``; callers must copy images before drawing."""
+    with _template_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+
+    template = build()
+
+    with _template_lock:
+        _templates[key] = template
+        _templates.move_to_end(key)
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    return template
+
+
+def clear_template_cache():
+    with _template_lock:
+        _templates.clear()
+
+
+@lru_cache(maxsize=64)
+def get_rounded_mask(width, height, radius):
+    mask = Image.new("L", (width, height), 0)
+    ImageDraw.Draw(mask).rounded_rectangle([0, 0, width, height], radius=radius, fill=255)
+    return mask
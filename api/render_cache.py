@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_key(*parts):
+    """Stable hex digest of JSON-serialisable ``parts`` (dict order ignored)."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Content-addressed store of rendered posts in a single folder.
+
+    Files are named ``<key><ext>``; a hit refreshes the file's mtime so
+    pruning evicts the least recently used renders first, after dropping
+    anything older than ``max_age_seconds``.
+    """
+
+    def __init__(self, folder, max_files=200, max_age_seconds=30 * 24 * 3600):
+        self.folder = folder
+        self.max_files = max_files
+        self.max_age_seconds = max_age_seconds
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Generators are pickled into the week render pool; locks can't be.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def path_for(self, key, ext):
+        return os.path.join(self.folder, f"{key}{ext}")
+
+    def lookup(self, key, ext):
+        path = self.path_for(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return path
+
+    def store(self, key, ext, write):
+        """Call ``write(tmp_path)`` and atomically move the result into place."""
+        path = self.path_for(key, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.prune()
+        return path
+
+    def prune(self):
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if os.path.isfile(path):
+                entries.append((stat.st_mtime, path))
+
+        entries.sort()
+        cutoff = time.time() - self.max_age_seconds
+        excess = max(0, len(entries) - self.max_files)
+        evicted = 0
+        for index, (mtime, path) in enumerate(entries):
+            if index >= excess and mtime >= cutoff:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+
+        if evicted:
+            with self._lock:
+                self.stats["evicted"] += evicted
+        return evicted
+
+
+class MemoryRenderCache:
+    """Bounded in-process LRU of encoded renders for the no-disk output mode."""
+
+    def __init__(self, max_items=16):
+        self.max_items = max_items
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.stats["evicted"] += 1
@@ -3,7 +3,11 @@ import os
 from datetime import datetime
 from json import load
 
-import requests
+try:
+    from .graph_session import get_graph_session
+except ImportError:
+    # Run directly as `python api/test_page_authority.py`.
+    from graph_session import get_graph_session
 
 
 GRAPH_API_VERSION = "v24.0"
@@ -44,7 +48,7 @@ def fetch_accounts(access_token: str) -> dict:
         "fields": "instagram_business_account,name,tasks",
         "access_token": access_token,
     }
-    response = requests.get(url, params=params, timeout=20)
+    response = get_graph_session().get(url, params=params, timeout=20)
     return response.json()
 
 
@@ -54,7 +58,7 @@ def fetch_page_instagram_business_account(page_id: str, access_token: str) -> di
         "fields": "instagram_business_account",
         "access_token": access_token,
     }
-    response = requests.get(url, params=params, timeout=20)
+    response = get_graph_session().get(url, params=params, timeout=20)
     return response.json()
 
 
@@ -0,0 +1,136 @@
+from collections import namedtuple
+from functools import lru_cache
+
+
+LayoutLine = namedtuple("LayoutLine", ["x", "y", "text", "font"])
+LayoutRule = namedtuple("LayoutRule", ["x0", "x1", "y"])
+
+
+@lru_cache(maxsize=16384)
+def _word_metrics(font, word):
+    # Advance width plus the vertical ink extent; a line's height is the
+    # union of its words' extents, so lines never need measuring whole.
+    _, top, _, bottom = font.getbbox(word)
+    return font.getlength(word), top, bottom
+
+
+def _space_width(font):
+    return _word_metrics(font, " ")[0]
+
+
+def _line_height(font, words):
+    if not words:
+        _, top, bottom = _word_metrics(font, " ")
+        return bottom - top
+    metrics = [_word_metrics(font, word) for word in words]
+    return max(bottom for _, _, bottom in metrics) - min(top for _, top, _ in metrics)
+
+
+def wrap_words(text, font, max_width):
+    """Greedy word wrap using cached per-word advances; returns lists of words."""
+    words = text.split()
+    if not words:
+        return [[]]
+
+    space = _space_width(font)
+    lines, line, width = [], [], 0
+    for word in words:
+        word_width = _word_metrics(font, word)[0]
+        if line and width + word_width + space > max_width:
+            lines.append(line)
+            line, width = [], 0
+        line.append(word)
+        width += word_width + space
+    lines.append(line)
+    return lines
+
+
+class MenuLayout:
+    """Positions for every line of a menu block, measured but not yet drawn."""
+
+    def __init__(self, lines, rules, top, bottom):
+        self.lines = lines
+        self.rules = rules
+        self.top = top
+        self.bottom = bottom
+
+    @property
+    def height(self):
+        return self.bottom - self.top
+
+    def overflows(self, limit_y):
+        return self.bottom > limit_y
+
+    def draw(self, draw, fill="black"):
+        for rule in self.rules:
+            draw.line([(rule.x0, rule.y), (rule.x1, rule.y)], fill=fill, width=2)
+        for line in self.lines:
+            draw.text((line.x, line.y), line.text, fill=fill, font=line.font)
+
+
+@lru_cache(maxsize=4096)
+def _renderable_icon(font, emoji):
+    """Return ``emoji`` as a single glyph ``font`` can draw, or None.
+
+    Without raqm Pillow can't shape ZWJ/keycap/flag sequences, and a missing
+    glyph rasterizes to the same .notdef box as an unassigned code point.
+    """
+    icon = emoji.replace("\ufe0f", "")
+    if len(icon) != 1:
+        return None
+    mask, notdef = font.getmask(icon), font.getmask("\ue000")
+    if mask.size == notdef.size and bytes(mask) == bytes(notdef):
+        return None
+    return icon
+
+
+def iter_menu_lines(menu_dict, annotations=None):
+    """Yield (text, is_header, emoji) for each header and item in the menu."""
+    annotations = annotations or {}
+    for header, items in menu_dict.items():
+        meal = annotations.get(header) or {}
+        yield f"{header}:", True, meal.get("emoji")
+        item_emojis = meal.get("items") or []
+        for index, item in enumerate(items):
+            emoji = item_emojis[index] if index < len(item_emojis) else None
+            yield item, False, emoji
+
+
+def layout_menu(menu_dict, fonts, start_y, image_width, margin=50, spacing=5, annotations=None):
+    """Lay out a menu block in one pass.
+
+    Section headers get a rule above them and use ``fonts["section"]``; items
+    are bulleted in ``fonts["body"]``. With ``annotations`` (see
+    get_emoji.annotate_day) and ``fonts["section_emoji"]``/``fonts["body_emoji"]``
+    an emoji replaces the bullet and the text hangs after it. Nothing is
+    rasterized until MenuLayout.draw is called.
+    """
+    max_width = image_width - (2 * margin)
+    lines, rules = [], []
+    y = start_y
+
+    for text, is_header, emoji in iter_menu_lines(menu_dict, annotations):
+        kind = "section" if is_header else "body"
+        if is_header:
+            rules.append(LayoutRule(margin, margin + max_width, y + 10))
+            y += 20
+        font, emoji_font = fonts[kind], fonts.get(f"{kind}_emoji")
+
+        icon = _renderable_icon(emoji_font, emoji) if emoji and emoji_font else None
+        text_x = margin
+        if icon:
+            lines.append(LayoutLine(margin, y, icon, emoji_font))
+            text_x += _word_metrics(emoji_font, icon)[0] + _space_width(font)
+        elif not is_header:
+            text = f"• {text}"
+
+        for index, words in enumerate(wrap_words(text, font, margin + max_width - text_x)):
+            lines.append(LayoutLine(text_x, y, " ".join(words), font))
+            line_height = _line_height(font, words)
+            if icon and index == 0:
+                _, icon_top, icon_bottom = _word_metrics(emoji_font, icon)
+                line_height = max(line_height, icon_bottom - icon_top)
+            y += line_height + spacing
+        y += 10
+
+    return MenuLayout(lines, rules, start_y, y)